@@ -4,7 +4,7 @@ import os
 
 db = SQLAlchemy()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     
     # Configure database
@@ -13,15 +13,59 @@ def create_app():
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = 'your-secret-key-here'
     
+    # Serialized response cache for read-heavy routes
+    app.config['RESPONSE_CACHE_SIZE'] = 256
+    app.config['RESPONSE_CACHE_TTL'] = 5.0
+    
+    # Opt-in request profiling and slow-query log
+    app.config['API_PROFILING'] = os.environ.get('API_MONITOR_PROFILING') == '1'
+    app.config['SLOW_QUERY_THRESHOLD_MS'] = float(os.environ.get('API_MONITOR_SLOW_QUERY_MS', 100))
+    
+    # Background anomaly scan interval in seconds (0 disables it)
+    app.config['ANOMALY_SCAN_INTERVAL'] = 300
+    
+    # Alert rules evaluated on every check result, and where notifications go
+    app.config['ALERT_RULES'] = [{'type': 'consecutive_failures', 'count': 3}]
+    app.config['ALERT_SINKS'] = [{'type': 'log'}]
+    app.config['ALERT_COOLDOWN'] = 300
+    
+    # Checks per second at which first runs are staggered after (re)start
+    app.config['STARTUP_PROBE_RATE'] = 50
+    
+    # Days of latency histogram cells kept per resolution in seconds (None keeps forever)
+    app.config['HISTOGRAM_RETENTION_DAYS'] = {60: 14, 3600: 400, 86400: None}
+    
+    # Headless serving: the worker holding this lock runs the scheduler, and
+    # the leader picks up endpoint changes made through other workers
+    app.config['LEADER_LOCK_FILE'] = os.path.join(basedir, "../instance/scheduler.lock")
+    app.config['LEADER_RETRY_INTERVAL'] = 10
+    app.config['SCHEDULE_SYNC_INTERVAL'] = 30
+    
+    # How long a SQLite connection waits for another worker's lock before failing
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = 30000
+    
+    # Overrides, e.g. a different database for benchmarks
+    if config:
+        app.config.update(config)
+    
     # Initialize database
     db.init_app(app)
     
     # Register routes
     from app.routes import bp
+    from app.cache import response_cache
+    from app.profiling import profiler
     app.register_blueprint(bp)
+    profiler.init_app(app)
+    response_cache.configure(
+        maxsize=app.config['RESPONSE_CACHE_SIZE'],
+        ttl=app.config['RESPONSE_CACHE_TTL']
+    )
     
-    # Create tables
+    # Create or upgrade tables only when the stored schema version is behind
+    from app.schema import configure_sqlite, ensure_schema
     with app.app_context():
-        db.create_all()
+        configure_sqlite(db.engine, app.config['SQLITE_BUSY_TIMEOUT_MS'])
+        ensure_schema()
     
     return app
\ No newline at end of file
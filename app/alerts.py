@@ -0,0 +1,340 @@
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+class _WindowCounter:
+    """Fixed ring of per-minute (count, hits) slots covering a sliding window"""
+    
+    __slots__ = ('minutes', 'slots')
+    
+    def __init__(self, minutes):
+        self.minutes = minutes
+        # Each slot holds [minute, count, hits]
+        self.slots = [[-1, 0, 0] for _ in range(minutes)]
+    
+    def add(self, now, hit):
+        minute = int(now // 60)
+        slot = self.slots[minute % self.minutes]
+        if slot[0] != minute:
+            slot[0], slot[1], slot[2] = minute, 0, 0
+        slot[1] += 1
+        slot[2] += 1 if hit else 0
+    
+    def totals(self, now):
+        oldest = int(now // 60) - self.minutes + 1
+        count = hits = 0
+        for minute, slot_count, slot_hits in self.slots:
+            if minute >= oldest:
+                count += slot_count
+                hits += slot_hits
+        return count, hits
+
+class Rule:
+    """Base class for alert rules evaluated on every check result.
+    
+    Subclasses keep a constant amount of state per endpoint and return
+    (firing, value, message) from evaluate().
+    """
+    type = None
+    
+    def __init__(self, name=None, endpoints=None, severity='warning'):
+        self.name = name or self.type
+        self.endpoints = set(endpoints) if endpoints else None
+        self.severity = severity
+    
+    def applies_to(self, endpoint_name):
+        return self.endpoints is None or endpoint_name in self.endpoints
+    
+    def new_state(self):
+        raise NotImplementedError
+    
+    def evaluate(self, state, now, response_time, is_success):
+        raise NotImplementedError
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'type': self.type,
+            'endpoints': sorted(self.endpoints) if self.endpoints else None,
+            'severity': self.severity
+        }
+
+class ConsecutiveFailures(Rule):
+    """Fire after N failed checks in a row"""
+    type = 'consecutive_failures'
+    
+    def __init__(self, count=3, **kwargs):
+        super().__init__(**kwargs)
+        self.count = count
+    
+    def new_state(self):
+        return [0]
+    
+    def evaluate(self, state, now, response_time, is_success):
+        state[0] = 0 if is_success else state[0] + 1
+        return state[0] >= self.count, state[0], f"{state[0]} consecutive failures (threshold {self.count})"
+    
+    def to_dict(self):
+        return dict(super().to_dict(), count=self.count)
+
+class LatencyPercentile(Rule):
+    """Fire when the given response-time percentile exceeds a threshold over a window.
+    
+    The p-th percentile is above the threshold exactly when more than
+    (100 - p)% of checks are slower than it, so only counts are kept.
+    """
+    type = 'latency_percentile'
+    
+    def __init__(self, threshold_ms, percentile=95, window_minutes=5, min_checks=5, **kwargs):
+        super().__init__(**kwargs)
+        self.threshold_ms = threshold_ms
+        self.percentile = percentile
+        self.window_minutes = window_minutes
+        self.min_checks = min_checks
+    
+    def new_state(self):
+        return _WindowCounter(self.window_minutes)
+    
+    def evaluate(self, state, now, response_time, is_success):
+        state.add(now, response_time * 1000 > self.threshold_ms)
+        count, slow = state.totals(now)
+        slow_pct = slow / count * 100
+        firing = count >= self.min_checks and slow_pct > 100 - self.percentile
+        message = (
+            f"{slow}/{count} checks slower than {self.threshold_ms}ms in last {self.window_minutes}m "
+            f"(p{self.percentile} {'above' if firing else 'within'} threshold)"
+        )
+        return firing, round(slow_pct, 2), message
+    
+    def to_dict(self):
+        return dict(
+            super().to_dict(),
+            threshold_ms=self.threshold_ms,
+            percentile=self.percentile,
+            window_minutes=self.window_minutes,
+            min_checks=self.min_checks
+        )
+
+class SuccessRateBelow(Rule):
+    """Fire when the success rate over a window drops below a threshold"""
+    type = 'success_rate'
+    
+    def __init__(self, threshold_pct, window_minutes=10, min_checks=5, **kwargs):
+        super().__init__(**kwargs)
+        self.threshold_pct = threshold_pct
+        self.window_minutes = window_minutes
+        self.min_checks = min_checks
+    
+    def new_state(self):
+        return _WindowCounter(self.window_minutes)
+    
+    def evaluate(self, state, now, response_time, is_success):
+        state.add(now, is_success)
+        count, successes = state.totals(now)
+        rate = successes / count * 100
+        firing = count >= self.min_checks and rate < self.threshold_pct
+        message = f"success rate {rate:.1f}% in last {self.window_minutes}m (threshold {self.threshold_pct}%)"
+        return firing, round(rate, 2), message
+    
+    def to_dict(self):
+        return dict(
+            super().to_dict(),
+            threshold_pct=self.threshold_pct,
+            window_minutes=self.window_minutes,
+            min_checks=self.min_checks
+        )
+
+RULE_TYPES = {cls.type: cls for cls in (ConsecutiveFailures, LatencyPercentile, SuccessRateBelow)}
+
+class LogSink:
+    """Write notifications to the application log"""
+    
+    def send(self, event):
+        log = logger.warning if event['status'] == 'firing' else logger.info
+        log(f"[{event['status'].upper()}] {event['rule']} on {event['endpoint_name']}: {event['message']}")
+
+class FileSink:
+    """Append notifications as JSON lines to a file"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+    
+    def send(self, event):
+        with self._lock, open(self.path, 'a') as f:
+            f.write(json.dumps(event) + '\n')
+
+class WebhookSink:
+    """POST notifications as JSON to a URL"""
+    
+    def __init__(self, url, timeout=5, headers=None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = headers or {}
+    
+    def send(self, event):
+        import requests
+        requests.post(self.url, json=event, headers=self.headers, timeout=self.timeout)
+
+SINK_TYPES = {'log': LogSink, 'file': FileSink, 'webhook': WebhookSink}
+
+def _build(types, config, kind):
+    config = dict(config)
+    type_name = config.pop('type', None)
+    if type_name not in types:
+        raise ValueError(f"Unknown {kind} type: {type_name}")
+    return types[type_name](**config)
+
+class AlertEngine:
+    """Evaluates rules incrementally on each check result and notifies sinks.
+    
+    Notifications are sent once when an alert starts firing (unless one was
+    sent for the same rule and endpoint within the cooldown) and once when it
+    resolves. Delivery happens on a background thread so slow sinks never
+    delay probes.
+    """
+    
+    def __init__(self, rules=None, sinks=None, cooldown=300):
+        self.rules = list(rules or [])
+        self.sinks = list(sinks or [])
+        self.cooldown = cooldown
+        self._states = {}   # (rule name, endpoint name) -> rule state
+        self._alerts = {}   # (rule name, endpoint name) -> alert record
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+    
+    def configure(self, rules=None, sinks=None, cooldown=None):
+        """Replace rules and sinks from config dicts such as {'type': 'success_rate', ...}"""
+        with self._lock:
+            if rules is not None:
+                built = [_build(RULE_TYPES, rule, 'rule') for rule in rules]
+                # State and alerts are keyed by rule name, so names must be unique
+                names = [rule.name for rule in built]
+                duplicates = sorted({name for name in names if names.count(name) > 1})
+                if duplicates:
+                    raise ValueError(
+                        f"Duplicate alert rule names: {', '.join(duplicates)}; "
+                        "give rules of the same type distinct names"
+                    )
+                self.rules = built
+                self._states.clear()
+                self._alerts.clear()
+            if sinks is not None:
+                self.sinks = [_build(SINK_TYPES, sink, 'sink') for sink in sinks]
+            if cooldown is not None:
+                self.cooldown = cooldown
+    
+    def observe(self, endpoint_name, response_time, is_success, now=None):
+        """Evaluate every applicable rule against one check result.
+        
+        Returns whether any alert started or stopped firing.
+        """
+        now = time.time() if now is None else now
+        changed = False
+        with self._lock:
+            for rule in self.rules:
+                if not rule.applies_to(endpoint_name):
+                    continue
+                key = (rule.name, endpoint_name)
+                state = self._states.get(key)
+                if state is None:
+                    state = self._states[key] = rule.new_state()
+                
+                alert = self._alerts.get(key)
+                was_firing = alert is not None and alert['firing']
+                firing, value, message = rule.evaluate(state, now, response_time, is_success)
+                event = self._transition(rule, endpoint_name, firing, value, message, now)
+                if event:
+                    # Queued under the lock so events reach sinks in transition order
+                    self._dispatch(event)
+                changed = changed or firing != was_firing
+        return changed
+    
+    def _transition(self, rule, endpoint_name, firing, value, message, now):
+        key = (rule.name, endpoint_name)
+        alert = self._alerts.get(key)
+        
+        if firing:
+            if alert is None:
+                alert = self._alerts[key] = {'firing': False, 'since': None, 'notified_at': None, 'notified': False}
+            alert['value'] = value
+            alert['message'] = message
+            if alert['firing']:
+                return None
+            alert['firing'] = True
+            alert['since'] = now
+            # Dedup flapping alerts within the cooldown
+            if alert['notified_at'] is not None and now - alert['notified_at'] < self.cooldown:
+                alert['notified'] = False
+                return None
+            alert['notified_at'] = now
+            alert['notified'] = True
+            return self._event(rule, endpoint_name, 'firing', value, message, now)
+        
+        if alert is not None and alert['firing']:
+            alert['firing'] = False
+            if alert['notified']:
+                return self._event(rule, endpoint_name, 'resolved', value, message, now)
+        return None
+    
+    def _event(self, rule, endpoint_name, status, value, message, now):
+        return {
+            'rule': rule.name,
+            'type': rule.type,
+            'severity': rule.severity,
+            'endpoint_name': endpoint_name,
+            'status': status,
+            'value': value,
+            'message': message,
+            'timestamp': datetime.utcfromtimestamp(now).isoformat()
+        }
+    
+    def _dispatch(self, event):
+        """Queue an event for the single delivery thread; called with self._lock held"""
+        if not self.sinks:
+            return
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._deliver, daemon=True)
+            self._worker.start()
+        self._queue.put(event)
+    
+    def _deliver(self):
+        while True:
+            event = self._queue.get()
+            for sink in self.sinks:
+                try:
+                    sink.send(event)
+                except Exception as e:
+                    logger.error(f"Alert sink {type(sink).__name__} failed: {e}")
+            self._queue.task_done()
+    
+    def forget(self, endpoint_name):
+        """Drop state for an endpoint that is no longer monitored"""
+        with self._lock:
+            for store in (self._states, self._alerts):
+                for key in [key for key in store if key[1] == endpoint_name]:
+                    del store[key]
+    
+    def active_alerts(self):
+        """Alerts currently firing"""
+        with self._lock:
+            rules = {rule.name: rule for rule in self.rules}
+            return [
+                {
+                    'rule': rule_name,
+                    'type': rules[rule_name].type,
+                    'severity': rules[rule_name].severity,
+                    'endpoint_name': endpoint_name,
+                    'value': alert['value'],
+                    'message': alert['message'],
+                    'since': datetime.utcfromtimestamp(alert['since']).isoformat()
+                }
+                for (rule_name, endpoint_name), alert in self._alerts.items()
+                if alert['firing'] and rule_name in rules
+            ]
@@ -0,0 +1,237 @@
+import warnings
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from sqlalchemy import cast, func, Integer
+from app import db
+from app.models import ApiMetrics
+
+def load_binned_metrics(start_time, bin_seconds, endpoint_name=None):
+    """Load per-endpoint, per-bin aggregates as NumPy arrays.
+    
+    Binning is pushed into SQL so only one row per endpoint and bin crosses
+    into Python. Returns (names, bins, counts, latency_sums, successes).
+    """
+    bin_expr = cast(cast(func.strftime('%s', ApiMetrics.timestamp), Integer) / bin_seconds, Integer)
+    query = db.session.query(
+        ApiMetrics.endpoint_name,
+        bin_expr.label('bin'),
+        func.count(ApiMetrics.id),
+        func.sum(ApiMetrics.response_time),
+        func.sum(ApiMetrics.is_success.cast(Integer))
+    ).filter(ApiMetrics.timestamp >= start_time)
+    if endpoint_name:
+        query = query.filter(ApiMetrics.endpoint_name == endpoint_name)
+    rows = query.group_by(ApiMetrics.endpoint_name, 'bin').all()
+    
+    if not rows:
+        empty = np.empty(0)
+        return np.empty(0, dtype=object), empty.astype(np.int64), empty, empty, empty
+    
+    names, bins, counts, sums, successes = zip(*rows)
+    return (
+        np.array(names, dtype=object),
+        np.array(bins, dtype=np.int64),
+        np.array(counts, dtype=np.float64),
+        np.array(sums, dtype=np.float64),
+        np.array(successes, dtype=np.float64)
+    )
+
+def _to_matrix(endpoint_index, bin_index, values, shape):
+    matrix = np.full(shape, np.nan)
+    matrix[endpoint_index, bin_index] = values
+    return matrix
+
+def ewma_zscores(values, alpha, min_periods, std_floor=0.05):
+    """EWMA baseline and z-score of each bin against the baseline before it.
+    
+    values is an (endpoints, bins) matrix with NaN for empty bins; the
+    recursion runs over bins with every endpoint updated in one vector step.
+    The standard deviation is floored at std_floor times the baseline so a
+    perfectly flat history does not hide the first deviation from it.
+    """
+    endpoints, bins = values.shape
+    mean = np.full(endpoints, np.nan)
+    var = np.zeros(endpoints)
+    seen = np.zeros(endpoints)
+    baseline = np.full(values.shape, np.nan)
+    scores = np.full(values.shape, np.nan)
+    
+    for b in range(bins):
+        x = values[:, b]
+        has = ~np.isnan(x)
+        first = has & np.isnan(mean)
+        mean[first] = x[first]
+        
+        update = has & ~first
+        baseline[update, b] = mean[update]
+        std = np.maximum(np.sqrt(var[update]), std_floor * np.abs(mean[update]) + 1e-6)
+        z = (x[update] - mean[update]) / std
+        z[seen[update] < min_periods] = np.nan
+        scores[update, b] = z
+        
+        diff = x[update] - mean[update]
+        increment = alpha * diff
+        mean[update] += increment
+        var[update] = (1 - alpha) * (var[update] + diff * increment)
+        seen[has] += 1
+    
+    return baseline, scores
+
+def seasonal_robust_zscores(values, period, mad_floor=0.05):
+    """Robust z-score of the latest period against the same slot in earlier periods.
+    
+    Returns (median, robust_z) for the bins of the latest period, using the
+    median and MAD of each slot over all previous periods. The MAD is floored
+    at mad_floor times the median, as in ewma_zscores.
+    """
+    endpoints, bins = values.shape
+    pad = (-bins) % period
+    padded = np.concatenate([np.full((endpoints, pad), np.nan), values], axis=1)
+    seasons = padded.reshape(endpoints, -1, period)
+    if seasons.shape[1] < 2:
+        nan = np.full((endpoints, period), np.nan)
+        return nan, nan
+    
+    history, current = seasons[:, :-1, :], seasons[:, -1, :]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        median = np.nanmedian(history, axis=1)
+        mad = np.nanmedian(np.abs(history - median[:, None, :]), axis=1)
+    mad = np.maximum(mad, mad_floor * np.abs(median) + 1e-6)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        robust_z = 0.6745 * (current - median) / mad
+    robust_z[~np.isfinite(robust_z)] = np.nan
+    return median, robust_z
+
+def _align_right(values, bins):
+    """Pad an (endpoints, n) matrix on the left with NaN to (endpoints, bins), or keep its last bins columns"""
+    endpoints, n = values.shape
+    if n >= bins:
+        return values[:, n - bins:]
+    return np.concatenate([np.full((endpoints, bins - n), np.nan), values], axis=1)
+
+def _clean(value, digits=4):
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+def detect_anomalies(hours=168, bin_minutes=5, season_hours=24, alpha=0.1,
+                     threshold=3.0, recent_bins=1, min_periods=12, endpoint_name=None):
+    """Score recent response time and success ratio per endpoint against rolling baselines.
+    
+    Every endpoint with checks in the window is reported, scored on its most
+    recent complete bins, and flagged with 'no_recent_data' once it has been
+    silent for more than three of its usual gaps between checks.
+    """
+    bin_seconds = bin_minutes * 60
+    period = max(1, season_hours * 60 // bin_minutes)
+    recent_bins = max(1, min(recent_bins, period))
+    now = datetime.utcnow()
+    start_time = now - timedelta(hours=hours)
+    
+    names, bins, counts, latency_sums, successes = load_binned_metrics(start_time, bin_seconds, endpoint_name)
+    result = {
+        'generated_at': now.isoformat(),
+        'params': {
+            'hours': hours, 'bin_minutes': bin_minutes, 'season_hours': season_hours,
+            'alpha': alpha, 'threshold': threshold, 'recent_bins': recent_bins
+        },
+        'endpoints': []
+    }
+    if len(names) == 0:
+        return result
+    
+    first_bin = int(start_time.replace(tzinfo=timezone.utc).timestamp()) // bin_seconds
+    last_bin = int(now.replace(tzinfo=timezone.utc).timestamp()) // bin_seconds
+    bins = np.clip(bins, first_bin, last_bin)
+    endpoint_names, endpoint_index = np.unique(names, return_inverse=True)
+    bin_index = bins - first_bin
+    shape = (len(endpoint_names), last_bin - first_bin + 1)
+    
+    count = _to_matrix(endpoint_index, bin_index, counts, shape)
+    latency = _to_matrix(endpoint_index, bin_index, latency_sums, shape) / count
+    success_ratio = _to_matrix(endpoint_index, bin_index, successes, shape) / count
+    
+    # The newest bin is still filling up, so it only shows whether an endpoint
+    # is alive; scores come from complete bins
+    seen = ~np.isnan(count)
+    count, latency, success_ratio = count[:, :-1], latency[:, :-1], success_ratio[:, :-1]
+    complete_bins = shape[1] - 1
+    if complete_bins == 0:
+        return result
+    
+    latency_ewma, latency_z = ewma_zscores(latency, alpha, min_periods)
+    success_ewma, success_z = ewma_zscores(success_ratio, alpha, min_periods)
+    seasonal_median, latency_robust_z = seasonal_robust_zscores(latency, period)
+    # Seasonal scores cover the last period only; shift them onto the full bin axis
+    seasonal_median = _align_right(seasonal_median, complete_bins)
+    latency_robust_z = _align_right(latency_robust_z, complete_bins)
+    
+    # Only a drop in success ratio is an anomaly
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        severity = np.nanmax(np.stack([latency_z, latency_robust_z, -success_z]), axis=0)
+    has_data = ~np.isnan(count)
+    severity = np.where(has_data, np.nan_to_num(severity, nan=-np.inf), np.nan)
+    
+    entries = []
+    for i, name in enumerate(endpoint_names):
+        recent = np.flatnonzero(has_data[i, -recent_bins:])
+        observed = np.flatnonzero(has_data[i])
+        if len(recent):
+            # The most severe non-empty bin among the most recent ones
+            # (the latest one on ties, e.g. before there is enough history to score)
+            window = severity[i, -recent_bins:][recent][::-1]
+            b = complete_bins - recent_bins + recent[len(recent) - 1 - np.argmax(window)]
+        elif len(observed):
+            # No check in the recent bins (e.g. intervals longer than a bin);
+            # fall back to the endpoint's latest data
+            b = observed[-1]
+        else:
+            b = None
+        
+        # Flag endpoints that went quiet for well over their usual check gap
+        alive = np.flatnonzero(seen[i])
+        silent_bins = shape[1] - 1 - alive[-1]
+        gaps = np.diff(alive)
+        no_recent_data = len(gaps) >= min_periods and silent_bins > max(recent_bins, 3 * np.median(gaps))
+        
+        reasons = []
+        if b is not None:
+            if latency_z[i, b] > threshold:
+                reasons.append('latency_ewma')
+            if latency_robust_z[i, b] > threshold:
+                reasons.append('latency_seasonal')
+            if -success_z[i, b] > threshold:
+                reasons.append('success_ratio')
+        if no_recent_data:
+            reasons.append('no_recent_data')
+        
+        entry = {
+            'endpoint_name': name,
+            'bin_start': None,
+            'checks': 0,
+            'silent_bins': int(silent_bins),
+            'is_anomaly': bool(reasons),
+            'reasons': reasons
+        }
+        if b is not None:
+            entry.update({
+                'bin_start': datetime.fromtimestamp((first_bin + b) * bin_seconds, timezone.utc).replace(tzinfo=None).isoformat(),
+                'checks': int(count[i, b]),
+                'response_time': _clean(latency[i, b]),
+                'response_time_ewma': _clean(latency_ewma[i, b]),
+                'response_time_z': _clean(latency_z[i, b], 2),
+                'response_time_seasonal_median': _clean(seasonal_median[i, b]),
+                'response_time_robust_z': _clean(latency_robust_z[i, b], 2),
+                'success_ratio': _clean(success_ratio[i, b]),
+                'success_ratio_ewma': _clean(success_ewma[i, b]),
+                'success_ratio_z': _clean(success_z[i, b], 2)
+            })
+        rank = -np.inf if b is None else severity[i, b]
+        entries.append((not reasons, -rank, entry))
+    
+    # Flagged endpoints first, then by severity
+    entries.sort(key=lambda item: item[:2])
+    result['endpoints'] = [entry for _, _, entry in entries]
+    
+    return result
@@ -0,0 +1,177 @@
+import json
+from sqlalchemy import insert, update
+from app import db
+from app.models import ApiEndpoints, ApiEndpointChange
+
+EXPORT_FIELDS = ['name', 'url', 'method', 'headers', 'body', 'timeout', 'check_interval', 'is_active']
+CONFLICT_MODES = ('update', 'skip', 'error')
+YAML_MIMETYPES = ('application/yaml', 'application/x-yaml', 'text/yaml', 'text/x-yaml')
+
+# Keep IN (...) lists well below SQLite's bound parameter limit
+CHUNK_SIZE = 500
+
+def _chunks(items, size=CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _json_field(value):
+    """Store headers/body the way the single-endpoint routes do: as a JSON string"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        json.loads(value)  # Validate JSON
+        return value
+    return json.dumps(value)
+
+def _positive_int(data, field, default):
+    value = data.get(field, default)
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise ValueError(f"{field} must be a positive integer")
+    return value
+
+def normalize_definition(data):
+    """Validate one endpoint definition and return its column values"""
+    if not isinstance(data, dict):
+        raise ValueError("Endpoint definition must be an object")
+    if not data.get('name') or not data.get('url'):
+        raise ValueError("Name and URL are required")
+    if not isinstance(data['name'], str) or not isinstance(data['url'], str):
+        raise ValueError("Name and URL must be strings")
+    if len(data['name']) > 100 or len(data['url']) > 500:
+        raise ValueError("Name or URL is too long")
+    
+    try:
+        headers = _json_field(data.get('headers'))
+        body = _json_field(data.get('body'))
+    except (TypeError, ValueError):
+        raise ValueError("Headers and body must be valid JSON")
+    
+    return {
+        'name': data['name'],
+        'url': data['url'],
+        'method': str(data.get('method', 'GET')).upper(),
+        'headers': headers,
+        'body': body,
+        'timeout': _positive_int(data, 'timeout', 30),
+        'check_interval': _positive_int(data, 'check_interval', 300),
+        'is_active': bool(data.get('is_active', True))
+    }
+
+def parse_definitions(raw, mimetype):
+    """Parse a JSON or YAML payload into a list of endpoint definitions"""
+    if mimetype in YAML_MIMETYPES:
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("YAML support requires PyYAML: pip install pyyaml")
+        try:
+            payload = yaml.safe_load(raw)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML: {e}")
+    else:
+        try:
+            payload = json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+    
+    if isinstance(payload, dict):
+        payload = payload.get('endpoints')
+    if not isinstance(payload, list):
+        raise ValueError("Expected a list of endpoints or an object with an 'endpoints' list")
+    return payload
+
+def dump_definitions(definitions, fmt='json'):
+    """Serialize endpoint definitions as JSON or YAML"""
+    if fmt == 'yaml':
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("YAML support requires PyYAML: pip install pyyaml")
+        return yaml.safe_dump({'endpoints': definitions}, sort_keys=False)
+    return json.dumps({'endpoints': definitions})
+
+def export_endpoints():
+    """Return every endpoint as an importable definition"""
+    columns = [getattr(ApiEndpoints, field) for field in EXPORT_FIELDS]
+    rows = db.session.query(*columns).order_by(ApiEndpoints.id).all()
+    return [dict(zip(EXPORT_FIELDS, row)) for row in rows]
+
+def import_endpoints(definitions, on_conflict='update'):
+    """Validate and upsert endpoint definitions in a single transaction.
+    
+    Nothing is written unless every definition is valid. Name conflicts with
+    existing endpoints are resolved per on_conflict: 'update' overwrites,
+    'skip' keeps the existing endpoint and 'error' rejects the whole import.
+    Returns a report dict with created, updated, skipped and errors.
+    """
+    if on_conflict not in CONFLICT_MODES:
+        raise ValueError(f"on_conflict must be one of: {', '.join(CONFLICT_MODES)}")
+    
+    report = {'created': 0, 'updated': 0, 'skipped': 0, 'errors': []}
+    rows = []
+    seen = set()
+    for index, data in enumerate(definitions):
+        try:
+            row = normalize_definition(data)
+        except ValueError as e:
+            report['errors'].append({'index': index, 'error': str(e)})
+            continue
+        if row['name'] in seen:
+            report['errors'].append({'index': index, 'error': f"Duplicate name in import: {row['name']}"})
+            continue
+        seen.add(row['name'])
+        rows.append(row)
+    
+    if report['errors']:
+        return report
+    
+    # Set-based conflict detection against existing names
+    existing = {}
+    names = [row['name'] for row in rows]
+    for chunk in _chunks(names):
+        existing.update(
+            db.session.query(ApiEndpoints.name, ApiEndpoints.id)
+            .filter(ApiEndpoints.name.in_(chunk)).all()
+        )
+    
+    new_rows = [row for row in rows if row['name'] not in existing]
+    conflicts = [row for row in rows if row['name'] in existing]
+    
+    if conflicts and on_conflict == 'error':
+        report['errors'] = [
+            {'name': row['name'], 'error': "Endpoint name already exists"} for row in conflicts
+        ]
+        return report
+    
+    try:
+        if new_rows:
+            db.session.execute(insert(ApiEndpoints), new_rows)
+            for chunk in _chunks([row['name'] for row in new_rows]):
+                existing.update(
+                    db.session.query(ApiEndpoints.name, ApiEndpoints.id)
+                    .filter(ApiEndpoints.name.in_(chunk)).all()
+                )
+        
+        if conflicts and on_conflict == 'update':
+            db.session.execute(
+                update(ApiEndpoints),
+                [dict(row, id=existing[row['name']]) for row in conflicts]
+            )
+        
+        changed = new_rows + (conflicts if on_conflict == 'update' else [])
+        if changed:
+            db.session.execute(
+                insert(ApiEndpointChange),
+                [{'endpoint_id': existing[row['name']], 'endpoint_name': row['name']} for row in changed]
+            )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    report['created'] = len(new_rows)
+    if on_conflict == 'update':
+        report['updated'] = len(conflicts)
+    else:
+        report['skipped'] = len(conflicts)
+    return report
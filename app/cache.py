@@ -0,0 +1,150 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timezone
+from functools import wraps
+from flask import Response, current_app, request
+from sqlalchemy import func
+from app import db
+from app.models import ApiMetrics, ApiEndpointChange
+from app.encoding import preferred_encoding
+
+class ResponseCache:
+    """Small thread-safe TTL cache of serialized responses, bounded by size"""
+    
+    def __init__(self, maxsize=256, ttl=5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+    
+    def configure(self, maxsize=None, ttl=None):
+        if maxsize is not None:
+            self.maxsize = maxsize
+        if ttl is not None:
+            self.ttl = ttl
+        self.clear()
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def get(self, key):
+        """Return the cached body for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, body = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return body
+    
+    def set(self, key, body):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def get_or_compute(self, key, compute):
+        """Return the cached body for key, computing it at most once concurrently"""
+        body = self.get(key)
+        if body is not None:
+            return body
+        
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        
+        with key_lock:
+            # Another request may have filled the entry while we waited
+            body = self.get(key)
+            if body is None:
+                body = compute()
+                if body is not None:
+                    self.set(key, body)
+        
+        with self._lock:
+            self._locks.pop(key, None)
+        return body
+
+def config_version():
+    """Return the endpoint-config version and when it last changed"""
+    version, changed_at = db.session.query(
+        func.max(ApiEndpointChange.id),
+        func.max(ApiEndpointChange.changed_at)
+    ).one()
+    return version or 0, changed_at
+
+def ingest_watermark():
+    """Return the id and timestamp of the most recently stored check"""
+    watermark = db.session.query(func.max(ApiMetrics.id)).scalar()
+    if watermark is None:
+        return 0, None
+    ingested_at = db.session.query(ApiMetrics.timestamp).filter(ApiMetrics.id == watermark).scalar()
+    return watermark, ingested_at
+
+def cached_response(track_ingest=True):
+    """Add ETag/Last-Modified handling and response caching to a JSON route.
+    
+    The validators are derived from the endpoint-config version and, when
+    track_ingest is set, the last-ingest watermark. Cached bodies are keyed
+    without the watermark so polls that arrive between checks share one
+    computation; RESPONSE_CACHE_TTL bounds how far a body lags ingest, and
+    each body is served with the validators it was computed under.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version, last_modified = config_version()
+            watermark = 0
+            if track_ingest:
+                watermark, ingested_at = ingest_watermark()
+                if ingested_at and (last_modified is None or ingested_at > last_modified):
+                    last_modified = ingested_at
+            if last_modified:
+                last_modified = last_modified.replace(tzinfo=timezone.utc)
+            
+            params = tuple(sorted(request.args.items(multi=True)))
+            key = (request.path, params, preferred_encoding(), version)
+            etag = hashlib.sha1(repr(key + (watermark,)).encode()).hexdigest()
+            
+            not_modified = False
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            elif request.if_modified_since and last_modified:
+                not_modified = last_modified.replace(microsecond=0) <= request.if_modified_since
+            
+            if not_modified:
+                response = Response(status=304)
+            else:
+                uncached = []
+                
+                def compute():
+                    result = current_app.make_response(view(*args, **kwargs))
+                    if result.status_code != 200:
+                        uncached.append(result)
+                        return None
+                    return result.get_data(), result.mimetype, etag, last_modified
+                
+                cached = response_cache.get_or_compute(key, compute)
+                if uncached:
+                    return uncached[0]
+                body, mimetype, etag, last_modified = cached
+                response = Response(body, mimetype=mimetype)
+            
+            response.set_etag(etag)
+            response.vary.add('Accept')
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+# Global response cache instance
+response_cache = ResponseCache()
@@ -0,0 +1,63 @@
+import json
+from flask import Response, request
+from sqlalchemy import cast, func, Integer
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value):
+    # Only reached by the json fallback; orjson encodes datetimes natively
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+def epoch_ms(column):
+    """SQL expression for a stored UTC datetime column as epoch milliseconds.
+    
+    Reads SQLite's 'YYYY-MM-DD HH:MM:SS.ffffff' text directly so sub-millisecond
+    digits are truncated like datetime.timestamp(), rather than rounded.
+    """
+    seconds = cast(func.strftime('%s', func.substr(column, 1, 19)), Integer)
+    return seconds * 1000 + cast(func.substr(column, 21, 3), Integer)
+
+def columns(names, rows):
+    """Transpose row tuples into a dict of parallel arrays keyed by column name"""
+    if not rows:
+        return {name: [] for name in names}
+    return dict(zip(names, map(list, zip(*rows))))
+
+def preferred_encoding():
+    """'msgpack' when the Accept header prefers it and msgpack is installed, else 'json'"""
+    if request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES) in MSGPACK_MIMETYPES:
+        if _msgpack() is not None:
+            return 'msgpack'
+    return 'json'
+
+def encode(payload):
+    """Serialize payload in the negotiated encoding.
+    
+    JSON goes through orjson when installed. MessagePack is used only for
+    clients that ask for it, since it needs the optional msgpack package.
+    """
+    if preferred_encoding() == 'msgpack':
+        response = Response(_msgpack().packb(payload, default=_default), mimetype='application/msgpack')
+    elif orjson is not None:
+        response = Response(orjson.dumps(payload), mimetype='application/json')
+    else:
+        body = json.dumps(payload, separators=(',', ':'), default=_default)
+        response = Response(body, mimetype='application/json')
+    
+    # The body depends on Accept, so shared caches must not mix encodings
+    response.vary.add('Accept')
+    return response
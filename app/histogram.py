@@ -0,0 +1,129 @@
+import math
+import time
+from bisect import bisect_left
+from sqlalchemy import case, cast, func, literal, select, Integer
+from sqlalchemy.dialects.sqlite import insert
+from app import db
+from app.models import ApiMetrics, ApiLatencyHistogram
+
+# Upper bounds in seconds: five log-spaced buckets per decade from 1ms to
+# 100s, followed by an overflow bucket
+BUCKET_BOUNDS = [float(f"{10 ** (exponent / 5):.3g}") for exponent in range(-15, 11)]
+BUCKET_LABELS = [f"{bound:g}" for bound in BUCKET_BOUNDS] + ["+Inf"]
+
+# Stored period lengths in seconds
+RESOLUTIONS = (60, 3600, 86400)
+
+# Upper limit on heatmap columns; coarser resolutions are picked beyond it
+MAX_COLUMNS = 2000
+
+_table = ApiLatencyHistogram.__table__
+
+def bucket_index(response_time):
+    """Index of the first bucket whose upper bound is at least response_time"""
+    return bisect_left(BUCKET_BOUNDS, response_time)
+
+def _upsert():
+    stmt = insert(_table)
+    return stmt.on_conflict_do_update(
+        index_elements=['endpoint_name', 'resolution', 'period_start', 'bucket'],
+        set_={'checks': _table.c.checks + stmt.excluded.checks}
+    )
+
+def record_latency(endpoint_name, response_time, timestamp=None):
+    """Count one check into its bucket at every resolution, in the current transaction"""
+    timestamp = int(time.time() if timestamp is None else timestamp)
+    bucket = bucket_index(response_time)
+    db.session.execute(_upsert(), [
+        {
+            'endpoint_name': endpoint_name,
+            'resolution': resolution,
+            'period_start': timestamp // resolution * resolution,
+            'bucket': bucket,
+            'checks': 1
+        }
+        for resolution in RESOLUTIONS
+    ])
+
+def backfill_histograms(connection):
+    """Build histogram cells for every stored check, bucketing in SQL"""
+    epoch = cast(func.strftime('%s', ApiMetrics.timestamp), Integer)
+    bucket = case(
+        *[(ApiMetrics.response_time <= bound, index) for index, bound in enumerate(BUCKET_BOUNDS)],
+        else_=len(BUCKET_BOUNDS)
+    )
+    for resolution in RESOLUTIONS:
+        period = cast(epoch / resolution, Integer) * resolution
+        rows = select(
+            ApiMetrics.endpoint_name, literal(resolution), period, bucket, func.count(ApiMetrics.id)
+        ).group_by(ApiMetrics.endpoint_name, period, bucket)
+        connection.execute(_table.insert().from_select(
+            ['endpoint_name', 'resolution', 'period_start', 'bucket', 'checks'], rows
+        ))
+
+def prune_histograms(retention_days):
+    """Delete cells older than the retention for their resolution; returns rows deleted"""
+    now = time.time()
+    deleted = 0
+    for resolution, days in retention_days.items():
+        if days is None:
+            continue
+        deleted += ApiLatencyHistogram.query.filter(
+            ApiLatencyHistogram.resolution == resolution,
+            ApiLatencyHistogram.period_start < now - days * 86400
+        ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+def choose_resolution(window_seconds, requested=None, retention_days=None):
+    """Pick (stored, output) resolutions for a window.
+    
+    The stored resolution is the coarsest one no coarser than the requested
+    output that still covers the window under its retention; the output
+    resolution is a multiple of it.
+    """
+    retention_days = retention_days or {}
+    usable = [
+        resolution for resolution in RESOLUTIONS
+        if retention_days.get(resolution) is None or retention_days[resolution] * 86400 >= window_seconds
+    ] or [RESOLUTIONS[-1]]
+    
+    target = max(requested or 0, window_seconds / MAX_COLUMNS)
+    finer = [resolution for resolution in usable if resolution <= target]
+    stored = max(finer) if finer else min(usable)
+    output = max(stored, math.ceil(target / stored) * stored)
+    return stored, output
+
+def heatmap(hours=24, resolution=None, endpoint_name=None, retention_days=None):
+    """Bucket counts per output period, merged from stored cells in SQL.
+    
+    Returns (resolution, stored_resolution, times, counts) where times are
+    period starts in epoch milliseconds and counts[i] holds one count per
+    bucket for times[i]. Periods are aligned to the output resolution.
+    """
+    window = hours * 3600
+    stored, output = choose_resolution(window, resolution, retention_days)
+    now = int(time.time())
+    first = (now - window) // output * output
+    
+    period = (cast(ApiLatencyHistogram.period_start / output, Integer) * output).label('period')
+    query = db.session.query(
+        period,
+        ApiLatencyHistogram.bucket,
+        func.sum(ApiLatencyHistogram.checks)
+    ).filter(
+        ApiLatencyHistogram.resolution == stored,
+        ApiLatencyHistogram.period_start >= first
+    )
+    if endpoint_name:
+        query = query.filter(ApiLatencyHistogram.endpoint_name == endpoint_name)
+    rows = query.group_by(period, ApiLatencyHistogram.bucket).all()
+    
+    columns = (now - first) // output + 1
+    counts = [[0] * len(BUCKET_LABELS) for _ in range(columns)]
+    for period_start, bucket, checks in rows:
+        column = (period_start - first) // output
+        if 0 <= column < columns:
+            counts[column][bucket] += checks
+    times = [(first + column * output) * 1000 for column in range(columns)]
+    return output, stored, times, counts
@@ -0,0 +1,228 @@
+import threading
+from bisect import bisect_left
+
+# Latency buckets in seconds, from 1ms to 60s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+    
+    def __init__(self, name, documentation, labels=(), scheduler=False):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        # Only meaningful in the process running the scheduled checks
+        self.scheduler = scheduler
+        self._values = {}
+        self._lock = threading.Lock()
+        if not self.label_names and self.kind != 'histogram':
+            self._values[()] = 0
+    
+    def _key(self, labels):
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}")
+        return tuple(labels)
+    
+    def value(self, *labels):
+        """Current value for a label set"""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+    
+    def render(self, const_labels=()):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels, const_labels)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = 'counter'
+    
+    def inc(self, amount=1, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    kind = 'gauge'
+    
+    def set(self, value, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def inc(self, amount=1, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def dec(self, amount=1, *labels):
+        self.inc(-amount, *labels)
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed cumulative buckets"""
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS, scheduler=False):
+        super().__init__(name, documentation, labels, scheduler)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (plus +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+    
+    def snapshot(self, *labels):
+        """Return (bucket counts, sum, count) for a label set"""
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, [[0] * (len(self.buckets) + 1), 0.0, 0])
+            return list(counts), total, count
+    
+    def quantile(self, q, *labels):
+        """Estimate a quantile as the upper bound of the bucket that contains it"""
+        counts, _, count = self.snapshot(*labels)
+        if count == 0:
+            return None
+        rank = q * count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bound
+        return float('inf')
+    
+    def render(self, const_labels=()):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        const_labels = list(const_labels)
+        with self._lock:
+            items = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._values.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                label_str = _format_labels(self.label_names, labels, const_labels + [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _format_labels(self.label_names, labels, const_labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Collection of internal metrics rendered in Prometheus text format"""
+    
+    def __init__(self):
+        self._metrics = []
+    
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+    
+    def counter(self, name, documentation, labels=(), scheduler=False):
+        return self._register(Counter(name, documentation, labels, scheduler))
+    
+    def gauge(self, name, documentation, labels=(), scheduler=False):
+        return self._register(Gauge(name, documentation, labels, scheduler))
+    
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS, scheduler=False):
+        return self._register(Histogram(name, documentation, labels, buckets, scheduler))
+    
+    def render(self, include_scheduler=True, const_labels=()):
+        """Render every metric, adding const_labels to each series.
+        
+        Scheduler metrics are skipped unless include_scheduler is set, so a
+        process that does not run checks exports no misleading zeros.
+        """
+        lines = []
+        for metric in self._metrics:
+            if metric.scheduler and not include_scheduler:
+                continue
+            lines.extend(metric.render(const_labels))
+        return '\n'.join(lines) + '\n'
+
+# Global registry and the monitor's own metrics
+registry = MetricsRegistry()
+
+SCHEDULE_LAG = registry.histogram(
+    'api_monitor_schedule_lag_seconds',
+    'Delay between a check\'s scheduled run time and its submission to the executor',
+    scheduler=True
+)
+PROBE_DURATION = registry.histogram(
+    'api_monitor_probe_duration_seconds',
+    'Duration of endpoint probes by outcome',
+    labels=('outcome',),
+    scheduler=True
+)
+PROBES_IN_FLIGHT = registry.gauge(
+    'api_monitor_probes_in_flight',
+    'Probes currently running',
+    scheduler=True
+)
+QUEUE_DEPTH = registry.gauge(
+    'api_monitor_queue_depth',
+    'Checks submitted to the executor that have not started yet',
+    scheduler=True
+)
+SCHEDULED_JOBS = registry.gauge(
+    'api_monitor_scheduled_jobs',
+    'Endpoint check jobs known to the scheduler',
+    scheduler=True
+)
+JOBS_MISSED = registry.counter(
+    'api_monitor_jobs_missed_total',
+    'Check runs skipped because they were past their misfire grace time',
+    scheduler=True
+)
+JOBS_DROPPED = registry.counter(
+    'api_monitor_jobs_dropped_total',
+    'Check runs dropped because the previous run was still in progress',
+    scheduler=True
+)
+JOBS_FAILED = registry.counter(
+    'api_monitor_jobs_failed_total',
+    'Check runs that raised an unhandled exception',
+    scheduler=True
+)
+WRITE_BATCH_SIZE = registry.histogram(
+    'api_monitor_db_write_batch_size',
+    'Rows written per metrics commit',
+    buckets=SIZE_BUCKETS,
+    scheduler=True
+)
+WRITE_LATENCY = registry.histogram(
+    'api_monitor_db_commit_seconds',
+    'Latency of metrics commits',
+    scheduler=True
+)
+ROUTE_LATENCY = registry.histogram(
+    'api_monitor_http_request_duration_seconds',
+    'API request latency by route',
+    labels=('route', 'method', 'status')
+)
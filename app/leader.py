@@ -0,0 +1,86 @@
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+class LeaderElection:
+    """Elect one process among several server workers to run the scheduler.
+    
+    Leadership is an exclusive, non-blocking lock on a file shared by all
+    workers. The OS drops the lock when the holder exits, so a standby
+    worker takes over on its next retry.
+    """
+    
+    def __init__(self, lock_path, on_elected, retry_interval=10):
+        self.lock_path = lock_path
+        self.on_elected = on_elected
+        self.retry_interval = retry_interval
+        self._file = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    @property
+    def is_leader(self):
+        return self._file is not None
+    
+    def try_acquire(self):
+        """Take the lock if it is free; returns whether this process is the leader"""
+        if self._file is not None:
+            return True
+        
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+        lock_file = open(self.lock_path, 'a+')
+        try:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+        
+        # Record the holder for operators; the lock itself is what counts
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(f"{os.getpid()}\n")
+        lock_file.flush()
+        self._file = lock_file
+        logger.info(f"Process {os.getpid()} elected scheduler leader")
+        return True
+    
+    def start(self):
+        """Try to become leader in the background, retrying until elected"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        if not self.try_acquire():
+            logger.info(f"Process {os.getpid()} on standby for scheduler leadership")
+            while not self.try_acquire():
+                if self._stop.wait(self.retry_interval):
+                    return
+        self.on_elected()
+    
+    def stop(self):
+        """Stop retrying and give up leadership, if held"""
+        self._stop.set()
+        if self._file is None:
+            return
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
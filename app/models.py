@@ -11,6 +11,13 @@ class ApiMetrics(db.Model):
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     error_message = db.Column(db.Text, nullable=True)
     
+    __table_args__ = (
+        db.Index('ix_api_metrics_timestamp', 'timestamp'),
+        db.Index('ix_api_metrics_endpoint_name_timestamp', 'endpoint_name', 'timestamp'),
+        # Ids of deleted checks are never reused, so the highest id is a safe sync watermark
+        {'sqlite_autoincrement': True},
+    )
+    
     def __repr__(self):
         return f'<ApiMetrics {self.endpoint_name}: {self.status_code}>'
     
@@ -53,4 +60,90 @@ class ApiEndpoints(db.Model):
             'is_active': self.is_active,
             'check_interval': self.check_interval,
             'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+class ApiLatencyHistogram(db.Model):
+    """Check counts per endpoint, time period and log-scale response-time bucket.
+    
+    Cells are kept at several resolutions (period lengths in seconds) and
+    incremented at ingest; see app.histogram.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    endpoint_name = db.Column(db.String(100), nullable=False)
+    resolution = db.Column(db.Integer, nullable=False)
+    period_start = db.Column(db.Integer, nullable=False)  # epoch seconds
+    bucket = db.Column(db.Integer, nullable=False)
+    checks = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('endpoint_name', 'resolution', 'period_start', 'bucket', name='uq_api_latency_histogram_cell'),
+        db.Index('ix_api_latency_histogram_resolution_period', 'resolution', 'period_start'),
+    )
+    
+    def __repr__(self):
+        return f'<ApiLatencyHistogram {self.endpoint_name} {self.resolution}s@{self.period_start}: {self.bucket}>'
+
+class ApiActiveAlert(db.Model):
+    """Alerts firing in the scheduler leader, mirrored so every server worker can report them"""
+    id = db.Column(db.Integer, primary_key=True)
+    rule = db.Column(db.String(100), nullable=False)
+    rule_type = db.Column(db.String(50), nullable=False)
+    severity = db.Column(db.String(20), nullable=False)
+    endpoint_name = db.Column(db.String(100), nullable=False)
+    value = db.Column(db.Float, nullable=True)
+    message = db.Column(db.Text, nullable=True)
+    since = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<ApiActiveAlert {self.rule}: {self.endpoint_name}>'
+    
+    @classmethod
+    def from_alert(cls, alert):
+        """Build a row from an AlertEngine.active_alerts() entry"""
+        return cls(
+            rule=alert['rule'],
+            rule_type=alert['type'],
+            severity=alert['severity'],
+            endpoint_name=alert['endpoint_name'],
+            value=alert['value'],
+            message=alert['message'],
+            since=datetime.fromisoformat(alert['since'])
+        )
+    
+    def to_dict(self):
+        return {
+            'rule': self.rule,
+            'type': self.rule_type,
+            'severity': self.severity,
+            'endpoint_name': self.endpoint_name,
+            'value': self.value,
+            'message': self.message,
+            'since': self.since.isoformat()
+        }
+
+class ApiEndpointChange(db.Model):
+    """Append-only log of endpoint configuration changes.
+    
+    The highest id is the endpoint-config version used for conditional GETs.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    endpoint_id = db.Column(db.Integer, nullable=False)
+    endpoint_name = db.Column(db.String(100), nullable=False)
+    is_deleted = db.Column(db.Boolean, nullable=False, default=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ApiEndpointChange {self.id}: {self.endpoint_name}>'
+    
+    @classmethod
+    def record(cls, endpoint, is_deleted=False):
+        """Add a change entry for an endpoint to the current session"""
+        if endpoint.id is None:
+            db.session.flush()
+        change = cls(
+            endpoint_id=endpoint.id,
+            endpoint_name=endpoint.name,
+            is_deleted=is_deleted
+        )
+        db.session.add(change)
+        return change
@@ -1,61 +1,282 @@
-import requests
 import time
 import json
 import logging
-from datetime import datetime
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from app import db
-from app.models import ApiMetrics, ApiEndpoints
-from apscheduler.schedulers.background import BackgroundScheduler
+from app.models import ApiMetrics, ApiEndpoints, ApiEndpointChange, ApiActiveAlert
+from app.bulk import import_endpoints
+from app.alerts import AlertEngine
+from app.cache import config_version
+from app.histogram import record_latency, prune_histograms
+from app.instrumentation import (
+    SCHEDULE_LAG, PROBE_DURATION, PROBES_IN_FLIGHT, QUEUE_DEPTH,
+    JOBS_MISSED, JOBS_DROPPED, JOBS_FAILED, WRITE_BATCH_SIZE, WRITE_LATENCY
+)
 from flask import current_app
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@contextmanager
+def _quiet_scheduler_log():
+    """Silence APScheduler's per-job INFO lines while jobs are changed in bulk"""
+    scheduler_logger = logging.getLogger('apscheduler.scheduler')
+    level = scheduler_logger.level
+    scheduler_logger.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        scheduler_logger.setLevel(level)
+
 class ApiMonitor:
     def __init__(self, app=None):
-        self.scheduler = BackgroundScheduler()
+        self._scheduler = None
         self.app = app
+        self.anomalies = None
+        self.config_version = None
+        self.alerts = AlertEngine()
+        self._publish_lock = threading.Lock()
+        if app is not None:
+            self._configure_alerts(app)
         
     def init_app(self, app):
         self.app = app
+        self._configure_alerts(app)
+    
+    def _configure_alerts(self, app):
+        """Load alert rules, sinks and cooldown from the app config"""
+        self.alerts.configure(
+            rules=app.config.get('ALERT_RULES', []),
+            sinks=app.config.get('ALERT_SINKS', []),
+            cooldown=app.config.get('ALERT_COOLDOWN')
+        )
         
+    @property
+    def scheduler(self):
+        """The background scheduler, created on first use to keep imports cheap"""
+        if self._scheduler is None:
+            from apscheduler.schedulers.background import BackgroundScheduler
+            from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES, EVENT_JOB_ERROR
+            self._scheduler = BackgroundScheduler()
+            self._scheduler.add_listener(
+                self._on_job_event,
+                EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES | EVENT_JOB_ERROR
+            )
+        return self._scheduler
+    
+    @property
+    def running(self):
+        return self._scheduler is not None and self._scheduler.running
+    
     def start_monitoring(self):
         """Start the background scheduler"""
-        if not self.scheduler.running:
+        if not self.running:
             self.scheduler.start()
             logger.info("API monitoring started")
+            # Replace alerts left behind by a previous leader
+            with self.app.app_context():
+                self._publish_alerts()
             self._schedule_checks()
+            self._schedule_anomaly_scan()
+            self._schedule_config_sync()
+            self._schedule_histogram_prune()
     
     def stop_monitoring(self):
         """Stop the background scheduler"""
-        if self.scheduler.running:
+        if self.running:
             self.scheduler.shutdown()
             logger.info("API monitoring stopped")
     
+    def refresh_schedule(self):
+        """Bring scheduled jobs in line with the database, if monitoring is running"""
+        if self.running:
+            self._schedule_checks()
+    
+    def refresh_endpoint(self, endpoint, deleted=False):
+        """Schedule or unschedule one changed endpoint, if monitoring is running"""
+        if not self.running:
+            return
+        if not deleted and endpoint.is_active:
+            self._schedule_endpoint(endpoint.id, endpoint.check_interval)
+        else:
+            self._unschedule_endpoint(endpoint.id)
+    
     def _schedule_checks(self):
-        """Schedule checks for all active endpoints"""
+        """Reconcile scheduled jobs with the active endpoints"""
         with self.app.app_context():
-            endpoints = ApiEndpoints.query.filter_by(is_active=True).all()
-            
-            # Remove existing jobs
-            for job in self.scheduler.get_jobs():
-                self.scheduler.remove_job(job.id)
+            self.config_version, _ = config_version()
+            endpoints = db.session.query(
+                ApiEndpoints.id, ApiEndpoints.check_interval
+            ).filter_by(is_active=True).all()
+        
+        desired = {f"check_{endpoint_id}": (endpoint_id, interval) for endpoint_id, interval in endpoints}
+        jobs = {job.id: job for job in self.scheduler.get_jobs() if job.id.startswith("check_")}
+        
+        stale = jobs.keys() - desired.keys()
+        new = [(endpoint_id, interval) for job_id, (endpoint_id, interval) in desired.items() if job_id not in jobs]
+        
+        # First runs of new jobs are spread out at STARTUP_PROBE_RATE checks/sec
+        # (but within one interval), so small catalogs probe right away and
+        # large ones do not all fire at once
+        rate = self.app.config.get('STARTUP_PROBE_RATE', 50)
+        now = datetime.now(timezone.utc)
+        
+        # Jobs with the same interval share one trigger instance
+        from apscheduler.triggers.interval import IntervalTrigger
+        triggers = {}
+        
+        rescheduled = 0
+        with _quiet_scheduler_log():
+            # Remove jobs for deleted or deactivated endpoints
+            for job_id in stale:
+                self.scheduler.remove_job(job_id)
             
-            # Add new jobs for active endpoints
-            for endpoint in endpoints:
-                self.scheduler.add_job(
-                    func=self._check_endpoint,
-                    trigger="interval",
-                    seconds=endpoint.check_interval,
-                    id=f"check_{endpoint.id}",
-                    args=[endpoint.id],
-                    replace_existing=True
-                )
-                logger.info(f"Scheduled checks for {endpoint.name} every {endpoint.check_interval} seconds")
+            # Add new jobs and reschedule those whose interval changed
+            for i, (endpoint_id, interval) in enumerate(new):
+                spread = min(interval, len(new) / rate)
+                if interval not in triggers:
+                    triggers[interval] = IntervalTrigger(seconds=interval)
+                self._schedule_endpoint(endpoint_id, triggers[interval], now + timedelta(seconds=spread * i / len(new)))
+            for job_id, job in jobs.items():
+                if job_id in desired and job.trigger.interval.total_seconds() != desired[job_id][1]:
+                    self.scheduler.reschedule_job(job_id, trigger="interval", seconds=desired[job_id][1])
+                    rescheduled += 1
+        added = len(new)
+        
+        logger.info(
+            f"Scheduled checks for {len(desired)} endpoints "
+            f"({added} added, {rescheduled} rescheduled, {len(stale)} removed)"
+        )
+    
+    def _schedule_endpoint(self, endpoint_id, check_interval, next_run_time=None):
+        """Schedule periodic checks for a single endpoint, first running at next_run_time (default now).
+        
+        check_interval is a number of seconds or a prebuilt IntervalTrigger.
+        """
+        if isinstance(check_interval, (int, float)):
+            trigger_args = {'trigger': "interval", 'seconds': check_interval}
+        else:
+            trigger_args = {'trigger': check_interval}
+        self.scheduler.add_job(
+            func=self._check_endpoint,
+            **trigger_args,
+            id=f"check_{endpoint_id}",
+            args=[endpoint_id],
+            next_run_time=next_run_time or datetime.now(timezone.utc),
+            replace_existing=True
+        )
+    
+    def _unschedule_endpoint(self, endpoint_id):
+        """Remove the scheduled checks for a single endpoint, if any"""
+        from apscheduler.jobstores.base import JobLookupError
+        try:
+            self.scheduler.remove_job(f"check_{endpoint_id}")
+        except JobLookupError:
+            pass
+    
+    def _schedule_config_sync(self):
+        """Periodically pick up endpoint changes made by other processes, e.g. other server workers"""
+        interval = self.app.config.get('SCHEDULE_SYNC_INTERVAL', 30)
+        if interval:
+            self.scheduler.add_job(
+                func=self._sync_config,
+                trigger="interval",
+                seconds=interval,
+                id="config_sync",
+                replace_existing=True
+            )
+    
+    def _sync_config(self):
+        """Reconcile scheduled jobs if the endpoint-config version moved"""
+        with self.app.app_context():
+            version, _ = config_version()
+        if version != self.config_version:
+            self._schedule_checks()
+    
+    def _schedule_histogram_prune(self):
+        """Hourly removal of latency histogram cells past their resolution's retention"""
+        self.scheduler.add_job(
+            func=self._prune_histograms,
+            trigger="interval",
+            seconds=3600,
+            id="histogram_prune",
+            replace_existing=True
+        )
+    
+    def _prune_histograms(self):
+        with self.app.app_context():
+            deleted = prune_histograms(self.app.config.get('HISTOGRAM_RETENTION_DAYS', {}))
+        if deleted:
+            logger.info(f"Pruned {deleted} latency histogram cells")
+    
+    def _schedule_anomaly_scan(self):
+        """Periodically score all endpoints for latency and success-ratio anomalies"""
+        interval = self.app.config.get('ANOMALY_SCAN_INTERVAL', 300)
+        if interval:
+            self.scheduler.add_job(
+                func=self._scan_anomalies,
+                trigger="interval",
+                seconds=interval,
+                id="anomaly_scan",
+                replace_existing=True
+            )
+    
+    def _scan_anomalies(self):
+        """Run anomaly detection with default parameters and keep the latest result"""
+        from app.anomaly import detect_anomalies
+        with self.app.app_context():
+            self.anomalies = detect_anomalies()
+        
+        flagged = [e['endpoint_name'] for e in self.anomalies['endpoints'] if e['is_anomaly']]
+        if flagged:
+            logger.warning(f"Anomalies detected for {len(flagged)} endpoints: {', '.join(flagged[:10])}")
+    
+    def _on_job_event(self, event):
+        """Record scheduler lateness, queueing and dropped runs for check jobs"""
+        from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES, EVENT_JOB_ERROR
+        if not event.job_id.startswith("check_"):
+            return
+        if event.code == EVENT_JOB_SUBMITTED:
+            lag = datetime.now(timezone.utc) - max(event.scheduled_run_times)
+            SCHEDULE_LAG.observe(max(lag.total_seconds(), 0.0))
+            # Each run time either calls _check_endpoint or is reported missed
+            QUEUE_DEPTH.inc(len(event.scheduled_run_times))
+        elif event.code == EVENT_JOB_MISSED:
+            # Runs past their grace time never reach _check_endpoint
+            QUEUE_DEPTH.dec()
+            JOBS_MISSED.inc()
+        elif event.code == EVENT_JOB_MAX_INSTANCES:
+            JOBS_DROPPED.inc()
+        elif event.code == EVENT_JOB_ERROR:
+            JOBS_FAILED.inc()
+    
+    def _commit_metrics(self, count=1):
+        """Commit pending metric rows, recording batch size and latency"""
+        start = time.perf_counter()
+        try:
+            db.session.commit()
+        except Exception:
+            # Leave the session usable for the error metric or the next check
+            db.session.rollback()
+            raise
+        WRITE_LATENCY.observe(time.perf_counter() - start)
+        WRITE_BATCH_SIZE.observe(count)
     
     def _check_endpoint(self, endpoint_id):
+        """Run a scheduled check, tracking queue depth and in-flight probes"""
+        QUEUE_DEPTH.dec()
+        PROBES_IN_FLIGHT.inc()
+        try:
+            self._probe_endpoint(endpoint_id)
+        finally:
+            PROBES_IN_FLIGHT.dec()
+    
+    def _probe_endpoint(self, endpoint_id):
         """Check a single endpoint and save metrics"""
+        import requests
         with self.app.app_context():
             endpoint = ApiEndpoints.query.get(endpoint_id)
             if not endpoint or not endpoint.is_active:
@@ -98,22 +319,56 @@ class ApiMonitor:
                 )
                 
                 db.session.add(metric)
-                db.session.commit()
+                record_latency(endpoint.name, response_time)
+                self._commit_metrics()
+                PROBE_DURATION.observe(response_time, "success" if is_success else "failure")
+                if self.alerts.observe(endpoint.name, response_time, is_success):
+                    self._publish_alerts()
                 
                 logger.info(f"Checked {endpoint.name}: {response.status_code} ({response_time:.2f}s)")
                 
             except requests.exceptions.Timeout:
                 response_time = time.time() - start_time
+                PROBE_DURATION.observe(response_time, "timeout")
                 self._save_error_metric(endpoint, response_time, 0, "Request timeout")
                 
             except requests.exceptions.ConnectionError:
                 response_time = time.time() - start_time
+                PROBE_DURATION.observe(response_time, "connection_error")
                 self._save_error_metric(endpoint, response_time, 0, "Connection error")
                 
             except Exception as e:
                 response_time = time.time() - start_time
+                PROBE_DURATION.observe(response_time, "error")
                 self._save_error_metric(endpoint, response_time, 0, str(e))
     
+    def _publish_alerts(self):
+        """Mirror firing alerts into the database so every server worker can report them.
+        
+        Runs only when an alert starts or stops firing. Alerts for endpoints
+        deleted through another worker are dropped here.
+        """
+        with self._publish_lock:
+            try:
+                alerts = self.alerts.active_alerts()
+                names = {alert['endpoint_name'] for alert in alerts}
+                existing = set()
+                if names:
+                    existing = {
+                        name for name, in db.session.query(ApiEndpoints.name).filter(ApiEndpoints.name.in_(names))
+                    }
+                for name in names - existing:
+                    self.alerts.forget(name)
+                
+                ApiActiveAlert.query.delete()
+                db.session.add_all(
+                    ApiActiveAlert.from_alert(alert) for alert in alerts if alert['endpoint_name'] in existing
+                )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Could not store active alerts: {e}")
+    
     def _save_error_metric(self, endpoint, response_time, status_code, error_message):
         """Save error metrics to database"""
         metric = ApiMetrics(
@@ -126,7 +381,10 @@ class ApiMonitor:
         )
         
         db.session.add(metric)
-        db.session.commit()
+        record_latency(endpoint.name, response_time)
+        self._commit_metrics()
+        if self.alerts.observe(endpoint.name, response_time, False):
+            self._publish_alerts()
         
         logger.error(f"Error checking {endpoint.name}: {error_message}")
     
@@ -146,30 +404,48 @@ class ApiMonitor:
             )
             
             db.session.add(endpoint)
+            ApiEndpointChange.record(endpoint)
             db.session.commit()
             
-            # Reschedule checks to include new endpoint
-            if self.scheduler.running:
-                self._schedule_checks()
+            # Schedule checks for the new endpoint only
+            if self.running:
+                self._schedule_endpoint(endpoint.id, endpoint.check_interval)
             
             logger.info(f"Added endpoint: {name}")
             return endpoint
     
+    def add_endpoints(self, definitions, on_conflict='update'):
+        """Import many endpoint definitions in one transaction.
+        
+        The scheduler is reconciled once afterwards instead of per endpoint.
+        Returns the import report from app.bulk.import_endpoints.
+        """
+        with self.app.app_context():
+            report = import_endpoints(definitions, on_conflict=on_conflict)
+        
+        if not report['errors']:
+            self.refresh_schedule()
+        
+        logger.info(
+            f"Imported endpoints: {report['created']} created, "
+            f"{report['updated']} updated, {report['skipped']} skipped"
+        )
+        return report
+    
     def remove_endpoint(self, endpoint_id):
         """Remove an endpoint from monitoring"""
         with self.app.app_context():
             endpoint = ApiEndpoints.query.get(endpoint_id)
             if endpoint:
                 # Remove scheduled job
-                job_id = f"check_{endpoint_id}"
-                try:
-                    self.scheduler.remove_job(job_id)
-                except:
-                    pass
+                self._unschedule_endpoint(endpoint_id)
                 
                 # Remove from database
+                ApiEndpointChange.record(endpoint, is_deleted=True)
+                ApiActiveAlert.query.filter_by(endpoint_name=endpoint.name).delete()
                 db.session.delete(endpoint)
                 db.session.commit()
+                self.alerts.forget(endpoint.name)
                 
                 logger.info(f"Removed endpoint: {endpoint.name}")
     
@@ -179,11 +455,15 @@ class ApiMonitor:
             endpoint = ApiEndpoints.query.get(endpoint_id)
             if endpoint:
                 endpoint.is_active = not endpoint.is_active
+                ApiEndpointChange.record(endpoint)
                 db.session.commit()
                 
-                # Reschedule checks
-                if self.scheduler.running:
-                    self._schedule_checks()
+                # Add or remove this endpoint's job
+                if self.running:
+                    if endpoint.is_active:
+                        self._schedule_endpoint(endpoint.id, endpoint.check_interval)
+                    else:
+                        self._unschedule_endpoint(endpoint.id)
                 
                 status = "activated" if endpoint.is_active else "deactivated"
                 logger.info(f"Endpoint {endpoint.name} {status}")
@@ -0,0 +1,253 @@
+import sys
+import threading
+import time
+from collections import Counter, deque
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from app import db
+
+class _Phase:
+    """Context manager adding elapsed time to a phase of the current request profile"""
+    
+    __slots__ = ('name', 'profile', 'start')
+    
+    def __init__(self, name):
+        self.name = name
+        self.profile = None
+    
+    def __enter__(self):
+        if has_request_context():
+            self.profile = g.get('profile')
+        if self.profile is not None:
+            self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        if self.profile is not None:
+            self.profile.add(self.name, time.perf_counter() - self.start)
+        return False
+
+class RequestProfile:
+    """Per-request phase timings"""
+    
+    def __init__(self, route):
+        self.route = route
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.queries = 0
+    
+    def add(self, name, elapsed):
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed
+    
+    def finish(self, status_code):
+        total = time.perf_counter() - self.start
+        phases = dict(self.phases)
+        # ORM time is the query phase minus the time spent executing SQL
+        if 'query' in phases:
+            phases['orm'] = max(phases.pop('query') - phases.get('sql', 0.0), 0.0)
+        phases['other'] = max(total - sum(phases.values()), 0.0)
+        return {
+            'route': self.route,
+            'method': request.method,
+            'status': status_code,
+            'queries': self.queries,
+            'total_ms': round(total * 1000, 3),
+            'phases_ms': {name: round(value * 1000, 3) for name, value in phases.items()}
+        }
+
+class _Sampler(threading.Thread):
+    """Samples the stack of one request thread until stopped.
+    
+    Counts go to a private Counter and are merged into the shared one under
+    its lock once sampling stops, so reports never see it mid-update.
+    """
+    
+    def __init__(self, thread_id, interval, stacks, lock):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.shared = stacks
+        self.lock = lock
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+    
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+        
+        with self.lock:
+            self.shared.update(self.stacks)
+
+class Profiler:
+    """Opt-in request profiling, slow-query log and route sampling for the API.
+    
+    Enabled with the API_PROFILING config flag. When disabled no hooks are
+    installed and phase() is a cheap no-op.
+    """
+    
+    def __init__(self, history=200):
+        self.enabled = False
+        self.slow_query_threshold = 0.1
+        self.sample_interval = 0.005
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=history)
+        self._routes = {}
+        self._slow_queries = {}
+        self._slow_parameters = {}
+        self._sample_route = None
+        self._sample_remaining = 0
+        self._samples = Counter()
+    
+    def init_app(self, app):
+        self.enabled = app.config.get('API_PROFILING', False)
+        self.slow_query_threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS', 100) / 1000
+        self.sample_interval = app.config.get('PROFILE_SAMPLE_INTERVAL', 0.005)
+        if not self.enabled:
+            return
+        
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+    
+    def phase(self, name):
+        """Time a named phase (e.g. 'query', 'serialize', 'encode') of the current request"""
+        return _Phase(name)
+    
+    def _before_request(self):
+        if request.blueprint != 'api' or request.url_rule is None:
+            return
+        route = request.url_rule.rule
+        g.profile = RequestProfile(route)
+        
+        with self._lock:
+            sample = route == self._sample_route and self._sample_remaining > 0
+            if sample:
+                self._sample_remaining -= 1
+        if sample:
+            g.sampler = _Sampler(threading.get_ident(), self.sample_interval, self._samples, self._lock)
+            g.sampler.start()
+    
+    def _after_request(self, response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        
+        result = profile.finish(response.status_code)
+        with self._lock:
+            self._recent.append(result)
+            stats = self._routes.setdefault(profile.route, {'count': 0, 'phases_ms': {}, 'total_ms': 0.0})
+            stats['count'] += 1
+            stats['total_ms'] += result['total_ms']
+            for name, value in result['phases_ms'].items():
+                stats['phases_ms'][name] = stats['phases_ms'].get(name, 0.0) + value
+        return response
+    
+    def _teardown_request(self, exc):
+        # Runs even when the view raised, unlike after_request
+        sampler = g.pop('sampler', None)
+        if sampler is not None:
+            sampler.stopped.set()
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+    
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        
+        if has_request_context():
+            profile = g.get('profile')
+            if profile is not None:
+                profile.add('sql', elapsed)
+                profile.queries += 1
+        
+        if elapsed >= self.slow_query_threshold and not statement.startswith('EXPLAIN'):
+            with self._lock:
+                self._slow_parameters[statement] = parameters
+                entry = self._slow_queries.setdefault(statement, {
+                    'statement': statement,
+                    'parameters': repr(parameters)[:500],
+                    'executemany': executemany,
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'plan': None
+                })
+                entry['count'] += 1
+                entry['total_ms'] += elapsed * 1000
+                entry['max_ms'] = max(entry['max_ms'], elapsed * 1000)
+    
+    def _query_plan(self, entry):
+        """Explain a captured statement; done on read so the hot path stays cheap"""
+        if entry['executemany']:
+            return None
+        prefix = 'EXPLAIN QUERY PLAN ' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+        parameters = self._slow_parameters.get(entry['statement'])
+        try:
+            with db.engine.connect() as conn:
+                result = conn.exec_driver_sql(prefix + entry['statement'], parameters)
+                return [list(row) for row in result]
+        except Exception as e:
+            return [f"Could not explain query: {e}"]
+    
+    def sample(self, route, requests=1):
+        """Sample the stack of the next N requests to a route"""
+        with self._lock:
+            self._sample_route = route
+            self._sample_remaining = requests
+            self._samples.clear()
+    
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self._routes.clear()
+            self._slow_queries.clear()
+            self._slow_parameters.clear()
+            self._samples.clear()
+    
+    def report(self, top=50):
+        """Snapshot of collected diagnostics"""
+        with self._lock:
+            recent = list(self._recent)
+            routes = {
+                route: {
+                    'count': stats['count'],
+                    'avg_total_ms': round(stats['total_ms'] / stats['count'], 3),
+                    'avg_phases_ms': {
+                        name: round(value / stats['count'], 3) for name, value in stats['phases_ms'].items()
+                    }
+                }
+                for route, stats in self._routes.items()
+            }
+            slow_queries = sorted(self._slow_queries.values(), key=lambda e: e['max_ms'], reverse=True)
+            samples = self._samples.most_common(top)
+            sampling = {'route': self._sample_route, 'remaining': self._sample_remaining}
+        
+        for entry in slow_queries:
+            if entry['plan'] is None:
+                entry['plan'] = self._query_plan(entry)
+        
+        return {
+            'enabled': self.enabled,
+            'slow_query_threshold_ms': self.slow_query_threshold * 1000,
+            'routes': routes,
+            'recent': recent[-top:],
+            'slow_queries': [
+                dict(entry, avg_ms=round(entry['total_ms'] / entry['count'], 3)) for entry in slow_queries
+            ],
+            'sampling': sampling,
+            'samples': [{'stack': stack, 'count': count} for stack, count in samples]
+        }
+
+# Global profiler instance
+profiler = Profiler()
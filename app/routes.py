@@ -1,16 +1,88 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, g
 from datetime import datetime, timedelta
-from sqlalchemy import func, desc
-from app.models import ApiMetrics, ApiEndpoints
+import os
+import time
+from sqlalchemy import func, desc, select, Integer
+from app.models import ApiMetrics, ApiEndpoints, ApiEndpointChange, ApiLatencyHistogram, ApiActiveAlert
+from app.cache import cached_response
+from app.encoding import encode, epoch_ms, columns
+from app.bulk import import_endpoints, export_endpoints, parse_definitions, dump_definitions
+from app.monitor import monitor
+from app.instrumentation import registry, ROUTE_LATENCY, SCHEDULED_JOBS
+from app.profiling import profiler
+from app.summary import parse_windows, summarize_windows, GROUP_BY_OPTIONS
+from app.histogram import heatmap, BUCKET_LABELS
+from app.sync import (
+    parse_watermark, metrics_watermark, endpoint_changes,
+    changed_metric_names, removed_metric_names, MAX_DELTA_NAMES
+)
 from app import db
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
+# Field order of a stored check in /metrics responses, as in ApiMetrics.to_dict
+METRIC_COLUMNS = (
+    'id', 'endpoint_name', 'endpoint_url', 'response_time',
+    'status_code', 'is_success', 'timestamp', 'error_message'
+)
+
+@bp.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@bp.after_request
+def record_request_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        ROUTE_LATENCY.observe(time.perf_counter() - start, route, request.method, response.status_code)
+    return response
+
 @bp.route('/health', methods=['GET'])
 def health_check():
     """Simple health check endpoint"""
     return jsonify({"status": "healthy", "timestamp": datetime.utcnow().isoformat()})
 
+@bp.route('/internal/metrics', methods=['GET'])
+def internal_metrics():
+    """Monitor self-instrumentation in Prometheus exposition format.
+    
+    Every worker serves its own series, labelled with its pid and role;
+    scheduler and probe series are only added by the process running the checks.
+    """
+    leader = monitor.running
+    if leader:
+        SCHEDULED_JOBS.set(len(monitor.scheduler.get_jobs()))
+    body = registry.render(
+        include_scheduler=leader,
+        const_labels=[('worker', os.getpid()), ('role', 'leader' if leader else 'worker')]
+    )
+    return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@bp.route('/internal/diagnostics', methods=['GET'])
+def diagnostics():
+    """Request phase timings, slow queries with plans and stack samples"""
+    return jsonify(profiler.report(top=request.args.get('top', 50, type=int)))
+
+@bp.route('/internal/diagnostics', methods=['DELETE'])
+def reset_diagnostics():
+    """Clear collected diagnostics"""
+    profiler.reset()
+    return jsonify({"message": "Diagnostics reset"})
+
+@bp.route('/internal/diagnostics/sample', methods=['POST'])
+def sample_route():
+    """Sample stacks for the next N requests to a route"""
+    data = request.get_json()
+    
+    if not profiler.enabled:
+        return jsonify({"error": "Profiling is disabled; set API_MONITOR_PROFILING=1"}), 400
+    if not data or not data.get('route'):
+        return jsonify({"error": "Route is required"}), 400
+    
+    profiler.sample(data['route'], data.get('requests', 1))
+    return jsonify({"message": f"Sampling next {data.get('requests', 1)} requests to {data['route']}"})
+
 @bp.route('/metrics', methods=['GET'])
 def get_metrics():
     """Get API metrics for Grafana"""
@@ -18,62 +90,251 @@ def get_metrics():
     endpoint_name = request.args.get('endpoint')
     hours = request.args.get('hours', 24, type=int)
     limit = request.args.get('limit', 1000, type=int)
+    fmt = request.args.get('format', 'rows')
+    if fmt not in ('rows', 'columnar'):
+        return jsonify({"error": "format must be rows or columnar"}), 400
     
     # Calculate time range
     start_time = datetime.utcnow() - timedelta(hours=hours)
     
-    # Build query
-    query = ApiMetrics.query.filter(ApiMetrics.timestamp >= start_time)
+    # Select plain column tuples; columnar output takes epoch-ms timestamps from SQL
+    timestamp = epoch_ms(ApiMetrics.timestamp) if fmt == 'columnar' else ApiMetrics.timestamp
+    query = select(
+        ApiMetrics.id,
+        ApiMetrics.endpoint_name,
+        ApiMetrics.endpoint_url,
+        ApiMetrics.response_time,
+        ApiMetrics.status_code,
+        ApiMetrics.is_success,
+        timestamp,
+        ApiMetrics.error_message
+    ).where(ApiMetrics.timestamp >= start_time)
     
     if endpoint_name:
-        query = query.filter(ApiMetrics.endpoint_name == endpoint_name)
+        query = query.where(ApiMetrics.endpoint_name == endpoint_name)
     
-    metrics = query.order_by(desc(ApiMetrics.timestamp)).limit(limit).all()
+    with profiler.phase('query'):
+        rows = db.session.execute(query.order_by(desc(ApiMetrics.timestamp)).limit(limit)).all()
     
-    return jsonify([metric.to_dict() for metric in metrics])
+    with profiler.phase('serialize'):
+        if fmt == 'columnar':
+            result = columns(METRIC_COLUMNS, rows)
+        else:
+            result = [dict(zip(METRIC_COLUMNS, row)) for row in rows]
+    
+    with profiler.phase('encode'):
+        return encode(result)
 
 @bp.route('/metrics/summary', methods=['GET'])
+@cached_response()
 def get_metrics_summary():
     """Get summary statistics for all endpoints"""
+    windows = request.args.get('windows')
+    group_by = request.args.get('group_by')
+    since = request.args.get('since')
     hours = request.args.get('hours', 24, type=int)
+    
+    if group_by and group_by not in GROUP_BY_OPTIONS:
+        return jsonify({"error": f"group_by must be one of: {', '.join(GROUP_BY_OPTIONS)}"}), 400
+    try:
+        windows = parse_windows(windows) if windows else None
+        if since is not None:
+            since_metric, since_version = parse_watermark(since, parts=2)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # With since, only endpoints that got new checks are summarized
+    endpoint_names = None
+    if since is not None:
+        with profiler.phase('query'):
+            metric_id, version = metrics_watermark()
+            full = since_metric == 0 or since_metric > metric_id or since_version > version
+            if not full:
+                endpoint_names = changed_metric_names(since_metric, metric_id)
+                if len(endpoint_names) > MAX_DELTA_NAMES:
+                    endpoint_names = None
+    
+    def delta(changed):
+        start_time = datetime.utcnow() - timedelta(hours=max(windows or [hours]))
+        return {
+            'watermark': f"{metric_id}-{version}",
+            'full': full,
+            'changed': changed,
+            'deleted': [] if full else removed_metric_names(since_version, version, start_time)
+        }
+    
+    # Several windows and/or status-class grouping come back in one compact response
+    if windows or group_by:
+        with profiler.phase('query'):
+            result = summarize_windows(windows or [hours], group_by, endpoint_names)
+            if since is not None:
+                result.update(delta(result.pop('endpoints')))
+        with profiler.phase('encode'):
+            return jsonify(result)
+    
     start_time = datetime.utcnow() - timedelta(hours=hours)
     
     # Get summary by endpoint
-    summary_query = db.session.query(
-        ApiMetrics.endpoint_name,
-        func.count(ApiMetrics.id).label('total_checks'),
-        func.sum(ApiMetrics.is_success.cast(db.Integer)).label('successful_checks'),
-        func.avg(ApiMetrics.response_time).label('avg_response_time'),
-        func.min(ApiMetrics.response_time).label('min_response_time'),
-        func.max(ApiMetrics.response_time).label('max_response_time'),
-        func.max(ApiMetrics.timestamp).label('last_check')
-    ).filter(
-        ApiMetrics.timestamp >= start_time
-    ).group_by(ApiMetrics.endpoint_name).all()
-    
-    summaries = []
-    for row in summary_query:
-        success_rate = (row.successful_checks / row.total_checks * 100) if row.total_checks > 0 else 0
-        
-        summaries.append({
-            'endpoint_name': row.endpoint_name,
-            'total_checks': row.total_checks,
-            'successful_checks': row.successful_checks,
-            'failed_checks': row.total_checks - row.successful_checks,
-            'success_rate': round(success_rate, 2),
-            'avg_response_time': round(row.avg_response_time, 3) if row.avg_response_time else 0,
-            'min_response_time': round(row.min_response_time, 3) if row.min_response_time else 0,
-            'max_response_time': round(row.max_response_time, 3) if row.max_response_time else 0,
-            'last_check': row.last_check.isoformat() if row.last_check else None
-        })
-    
-    return jsonify(summaries)
+    with profiler.phase('query'):
+        summary_query = db.session.query(
+            ApiMetrics.endpoint_name,
+            func.count(ApiMetrics.id).label('total_checks'),
+            func.sum(ApiMetrics.is_success.cast(db.Integer)).label('successful_checks'),
+            func.avg(ApiMetrics.response_time).label('avg_response_time'),
+            func.min(ApiMetrics.response_time).label('min_response_time'),
+            func.max(ApiMetrics.response_time).label('max_response_time'),
+            func.max(ApiMetrics.timestamp).label('last_check')
+        ).filter(
+            ApiMetrics.timestamp >= start_time
+        )
+        if endpoint_names is not None:
+            summary_query = summary_query.filter(ApiMetrics.endpoint_name.in_(endpoint_names))
+        summary_query = summary_query.group_by(ApiMetrics.endpoint_name).all()
+    
+    with profiler.phase('serialize'):
+        summaries = []
+        for row in summary_query:
+            success_rate = (row.successful_checks / row.total_checks * 100) if row.total_checks > 0 else 0
+            
+            summaries.append({
+                'endpoint_name': row.endpoint_name,
+                'total_checks': row.total_checks,
+                'successful_checks': row.successful_checks,
+                'failed_checks': row.total_checks - row.successful_checks,
+                'success_rate': round(success_rate, 2),
+                'avg_response_time': round(row.avg_response_time, 3) if row.avg_response_time else 0,
+                'min_response_time': round(row.min_response_time, 3) if row.min_response_time else 0,
+                'max_response_time': round(row.max_response_time, 3) if row.max_response_time else 0,
+                'last_check': row.last_check.isoformat() if row.last_check else None
+            })
+    
+    if since is not None:
+        with profiler.phase('query'):
+            summaries = delta(summaries)
+    
+    with profiler.phase('encode'):
+        return jsonify(summaries)
+
+@bp.route('/metrics/heatmap', methods=['GET'])
+@cached_response()
+def get_latency_heatmap():
+    """Response-time histogram per time period, for Grafana heatmaps"""
+    endpoint_name = request.args.get('endpoint')
+    hours = request.args.get('hours', 24, type=int)
+    resolution = request.args.get('resolution', type=int)
+    fmt = request.args.get('format', 'grafana')
+    if hours <= 0 or (resolution is not None and resolution <= 0):
+        return jsonify({"error": "hours and resolution must be positive"}), 400
+    if fmt not in ('grafana', 'matrix'):
+        return jsonify({"error": "format must be grafana or matrix"}), 400
+    
+    with profiler.phase('query'):
+        resolution, stored_resolution, times, counts = heatmap(
+            hours=hours,
+            resolution=resolution,
+            endpoint_name=endpoint_name,
+            retention_days=current_app.config.get('HISTOGRAM_RETENTION_DAYS')
+        )
+    
+    with profiler.phase('serialize'):
+        if fmt == 'matrix':
+            result = {
+                'resolution': resolution,
+                'stored_resolution': stored_resolution,
+                'buckets': BUCKET_LABELS,
+                'times': times,
+                'counts': counts
+            }
+        else:
+            # One series per non-empty bucket, named by its upper bound in seconds
+            result = [
+                {
+                    "target": label,
+                    "datapoints": [[row[bucket], timestamp_ms] for row, timestamp_ms in zip(counts, times)]
+                }
+                for bucket, label in enumerate(BUCKET_LABELS)
+                if any(row[bucket] for row in counts)
+            ]
+    
+    with profiler.phase('encode'):
+        return jsonify(result)
+
+@bp.route('/metrics/anomalies', methods=['GET'])
+@cached_response()
+def get_anomalies():
+    """Score recent latency and success ratio per endpoint against rolling baselines"""
+    from app.anomaly import detect_anomalies
+    only_anomalies = request.args.get('only_anomalies', 0, type=int)
+    params = {key: value for key, value in request.args.items() if key != 'only_anomalies'}
+    
+    hours = request.args.get('hours', 168, type=int)
+    bin_minutes = request.args.get('bin_minutes', 5, type=int)
+    season_hours = request.args.get('season_hours', 24, type=int)
+    alpha = request.args.get('alpha', 0.1, type=float)
+    threshold = request.args.get('threshold', 3.0, type=float)
+    recent_bins = request.args.get('recent_bins', 1, type=int)
+    if min(hours, bin_minutes, season_hours, recent_bins) <= 0 or threshold <= 0:
+        return jsonify({"error": "hours, bin_minutes, season_hours, recent_bins and threshold must be positive"}), 400
+    if not 0 < alpha <= 1:
+        return jsonify({"error": "alpha must be in (0, 1]"}), 400
+    
+    # The background scan already covers the default parameters
+    if not params and monitor.anomalies is not None:
+        result = monitor.anomalies
+    else:
+        result = detect_anomalies(
+            hours=hours,
+            bin_minutes=bin_minutes,
+            season_hours=season_hours,
+            alpha=alpha,
+            threshold=threshold,
+            recent_bins=recent_bins,
+            endpoint_name=request.args.get('endpoint')
+        )
+    
+    if only_anomalies:
+        result = dict(result, endpoints=[e for e in result['endpoints'] if e['is_anomaly']])
+    return jsonify(result)
+
+@bp.route('/alerts', methods=['GET'])
+def get_alerts():
+    """Get alerts currently firing"""
+    # Read from the table the scheduler leader keeps, so any worker can answer
+    alerts = ApiActiveAlert.query.order_by(ApiActiveAlert.since).all()
+    return jsonify([alert.to_dict() for alert in alerts])
+
+@bp.route('/alerts/rules', methods=['GET'])
+def get_alert_rules():
+    """Get the configured alert rules"""
+    return jsonify({
+        "rules": [rule.to_dict() for rule in monitor.alerts.rules],
+        "cooldown": monitor.alerts.cooldown
+    })
 
 @bp.route('/endpoints', methods=['GET'])
+@cached_response(track_ingest=False)
 def get_endpoints():
     """Get all configured endpoints"""
-    endpoints = ApiEndpoints.query.all()
-    return jsonify([endpoint.to_dict() for endpoint in endpoints])
+    # With since, only endpoints changed after that config version plus deleted ids
+    since = request.args.get('since')
+    if since is not None:
+        try:
+            since = parse_watermark(since)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        with profiler.phase('query'):
+            changes = endpoint_changes(since)
+        with profiler.phase('encode'):
+            return jsonify(changes)
+    
+    with profiler.phase('query'):
+        endpoints = ApiEndpoints.query.all()
+    
+    with profiler.phase('serialize'):
+        rows = [endpoint.to_dict() for endpoint in endpoints]
+    
+    with profiler.phase('encode'):
+        return jsonify(rows)
 
 @bp.route('/endpoints', methods=['POST'])
 def create_endpoint():
@@ -100,10 +361,45 @@ def create_endpoint():
     )
     
     db.session.add(endpoint)
+    ApiEndpointChange.record(endpoint)
     db.session.commit()
+    monitor.refresh_endpoint(endpoint)
     
     return jsonify(endpoint.to_dict()), 201
 
+@bp.route('/endpoints/export', methods=['GET'])
+def export_endpoint_definitions():
+    """Export all endpoint definitions as JSON or YAML"""
+    fmt = request.args.get('format', 'json')
+    if fmt not in ('json', 'yaml'):
+        return jsonify({"error": "format must be json or yaml"}), 400
+    
+    try:
+        payload = dump_definitions(export_endpoints(), fmt)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    mimetype = 'application/yaml' if fmt == 'yaml' else 'application/json'
+    return Response(payload, mimetype=mimetype)
+
+@bp.route('/endpoints/import', methods=['POST'])
+def import_endpoint_definitions():
+    """Validate and upsert a list of endpoint definitions in one transaction"""
+    on_conflict = request.args.get('on_conflict', 'update')
+    
+    try:
+        definitions = parse_definitions(request.get_data(), request.mimetype)
+        report = import_endpoints(definitions, on_conflict=on_conflict)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if report['errors']:
+        return jsonify(report), 400
+    
+    # Reconcile the scheduler once for the whole import
+    monitor.refresh_schedule()
+    return jsonify(report)
+
 @bp.route('/endpoints/<int:endpoint_id>', methods=['PUT'])
 def update_endpoint(endpoint_id):
     """Update an existing endpoint"""
@@ -139,7 +435,9 @@ def update_endpoint(endpoint_id):
     if 'is_active' in data:
         endpoint.is_active = data['is_active']
     
+    ApiEndpointChange.record(endpoint)
     db.session.commit()
+    monitor.refresh_endpoint(endpoint)
     return jsonify(endpoint.to_dict())
 
 @bp.route('/endpoints/<int:endpoint_id>', methods=['DELETE'])
@@ -149,10 +447,15 @@ def delete_endpoint(endpoint_id):
     
     # Delete associated metrics
     ApiMetrics.query.filter_by(endpoint_name=endpoint.name).delete()
+    ApiLatencyHistogram.query.filter_by(endpoint_name=endpoint.name).delete()
+    ApiActiveAlert.query.filter_by(endpoint_name=endpoint.name).delete()
     
     # Delete endpoint
+    ApiEndpointChange.record(endpoint, is_deleted=True)
     db.session.delete(endpoint)
     db.session.commit()
+    monitor.refresh_endpoint(endpoint, deleted=True)
+    monitor.alerts.forget(endpoint.name)
     
     return jsonify({"message": "Endpoint deleted successfully"})
 
@@ -161,7 +464,9 @@ def toggle_endpoint(endpoint_id):
     """Toggle endpoint active status"""
     endpoint = ApiEndpoints.query.get_or_404(endpoint_id)
     endpoint.is_active = not endpoint.is_active
+    ApiEndpointChange.record(endpoint)
     db.session.commit()
+    monitor.refresh_endpoint(endpoint)
     
     return jsonify({
         "message": f"Endpoint {'activated' if endpoint.is_active else 'deactivated'}",
@@ -169,30 +474,45 @@ def toggle_endpoint(endpoint_id):
     })
 
 @bp.route('/metrics/grafana', methods=['GET'])
+@cached_response()
 def grafana_metrics():
     """Grafana-compatible metrics endpoint"""
     # This endpoint formats data specifically for Grafana queries
     endpoint_name = request.args.get('endpoint')
     hours = request.args.get('hours', 24, type=int)
+    fmt = request.args.get('format', 'grafana')
+    if fmt not in ('grafana', 'columnar'):
+        return jsonify({"error": "format must be grafana or columnar"}), 400
     
     start_time = datetime.utcnow() - timedelta(hours=hours)
     
-    query = ApiMetrics.query.filter(ApiMetrics.timestamp >= start_time)
+    query = select(
+        epoch_ms(ApiMetrics.timestamp),
+        ApiMetrics.endpoint_name,
+        ApiMetrics.response_time,
+        ApiMetrics.is_success.cast(Integer)
+    ).where(ApiMetrics.timestamp >= start_time)
     if endpoint_name:
-        query = query.filter(ApiMetrics.endpoint_name == endpoint_name)
+        query = query.where(ApiMetrics.endpoint_name == endpoint_name)
     
-    metrics = query.order_by(ApiMetrics.timestamp).all()
+    with profiler.phase('query'):
+        rows = db.session.execute(query.order_by(ApiMetrics.timestamp)).all()
     
     # Format for Grafana
-    datapoints = []
-    for metric in metrics:
-        timestamp_ms = int(metric.timestamp.timestamp() * 1000)
-        datapoints.append({
-            "target": metric.endpoint_name,
-            "datapoints": [
-                [metric.response_time, timestamp_ms],
-                [1 if metric.is_success else 0, timestamp_ms]  # Success as 1/0
+    with profiler.phase('serialize'):
+        if fmt == 'columnar':
+            result = columns(('timestamp', 'endpoint_name', 'response_time', 'is_success'), rows)
+        else:
+            result = [
+                {
+                    "target": name,
+                    "datapoints": [
+                        [response_time, timestamp_ms],
+                        [is_success, timestamp_ms]  # Success as 1/0
+                    ]
+                }
+                for timestamp_ms, name, response_time, is_success in rows
             ]
-        })
     
-    return jsonify(datapoints)
\ No newline at end of file
+    with profiler.phase('encode'):
+        return encode(result)
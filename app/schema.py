@@ -0,0 +1,99 @@
+import logging
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models import ApiMetrics, ApiLatencyHistogram, ApiActiveAlert
+from app.histogram import backfill_histograms
+
+logger = logging.getLogger(__name__)
+
+def _create_tables(connection):
+    db.metadata.create_all(connection)
+
+def _create_metric_indexes(connection):
+    for index in ApiMetrics.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+def _create_latency_histograms(connection):
+    ApiLatencyHistogram.__table__.create(connection, checkfirst=True)
+    backfill_histograms(connection)
+
+def _create_active_alerts(connection):
+    ApiActiveAlert.__table__.create(connection, checkfirst=True)
+
+def _autoincrement_metric_ids(connection):
+    # SQLite cannot add AUTOINCREMENT to an existing table, so rebuild it
+    table_sql = connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'api_metrics'")
+    ).scalar()
+    if 'AUTOINCREMENT' in table_sql.upper():
+        return
+    for index in ApiMetrics.__table__.indexes:
+        connection.execute(text(f'DROP INDEX IF EXISTS {index.name}'))
+    connection.execute(text('ALTER TABLE api_metrics RENAME TO api_metrics_old'))
+    ApiMetrics.__table__.create(connection)
+    columns = ', '.join(column.name for column in ApiMetrics.__table__.columns)
+    connection.execute(text(f'INSERT INTO api_metrics ({columns}) SELECT {columns} FROM api_metrics_old'))
+    connection.execute(text('DROP TABLE api_metrics_old'))
+
+# Each step brings the schema up one version; append new steps, never edit old ones
+MIGRATIONS = [
+    _create_tables,
+    _create_metric_indexes,
+    _create_latency_histograms,
+    _create_active_alerts,
+    _autoincrement_metric_ids
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def _migrate(engine):
+    with engine.begin() as connection:
+        version = connection.execute(text('PRAGMA user_version')).scalar()
+        if version >= SCHEMA_VERSION:
+            return
+        for step in MIGRATIONS[version:]:
+            step(connection)
+        connection.execute(text(f'PRAGMA user_version = {SCHEMA_VERSION}'))
+    logger.info(f"Database schema upgraded from version {version} to {SCHEMA_VERSION}")
+
+def configure_sqlite(engine, busy_timeout_ms=30000):
+    """Set a busy timeout on every connection and keep the database in WAL mode.
+    
+    In the default rollback journal an open read transaction in one worker
+    makes another worker's commit fail with "database is locked"; under WAL
+    readers and the writer no longer block each other. The journal mode is
+    stored in the database file, so this is a no-op once it has been set.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    
+    @event.listens_for(engine, 'connect')
+    def _set_busy_timeout(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA busy_timeout = {int(busy_timeout_ms)}')
+        cursor.close()
+    
+    # journal_mode cannot change inside a transaction, so not a migration step
+    with engine.connect() as connection:
+        mode = connection.exec_driver_sql('PRAGMA journal_mode').scalar()
+        if mode not in ('wal', 'memory'):
+            connection.exec_driver_sql('PRAGMA journal_mode=WAL')
+
+def ensure_schema():
+    """Bring the database up to SCHEMA_VERSION, doing nothing when it is current.
+    
+    SQLite keeps the version in PRAGMA user_version, so a normal start costs
+    one pragma read instead of inspecting every table. Other databases fall
+    back to create_all.
+    """
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        db.create_all()
+        return
+    
+    try:
+        _migrate(engine)
+    except OperationalError:
+        # Another worker may have been migrating at the same time; the steps
+        # are idempotent, so run whatever is still missing once more
+        _migrate(engine)
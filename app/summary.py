@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+from sqlalchemy import case, cast, func, literal, Integer
+from app import db
+from app.models import ApiMetrics
+
+MAX_WINDOWS = 8
+GROUP_BY_OPTIONS = ('status_class',)
+
+def parse_windows(raw):
+    """Parse a comma-separated list of window sizes in hours, e.g. '1,24,168'"""
+    try:
+        windows = sorted({int(value) for value in raw.split(',') if value.strip()})
+    except ValueError:
+        raise ValueError("windows must be a comma-separated list of hours")
+    if not windows or windows[0] <= 0:
+        raise ValueError("windows must be positive numbers of hours")
+    if len(windows) > MAX_WINDOWS:
+        raise ValueError(f"At most {MAX_WINDOWS} windows are supported")
+    return windows
+
+def _status_class(code):
+    return f"{code}xx" if code else 'error'
+
+def summarize_windows(windows, group_by=None, endpoint_names=None):
+    """Per-endpoint summary for several windows in one scan.
+    
+    Rows are filtered to the widest window and tagged with the narrowest
+    window containing them, so SQL aggregates disjoint rings once and each
+    window is the running total of the rings inside it.
+    """
+    now = datetime.utcnow()
+    starts = [now - timedelta(hours=hours) for hours in windows]
+    if len(starts) > 1:
+        ring = case(
+            *[(ApiMetrics.timestamp >= start, i) for i, start in enumerate(starts[:-1])],
+            else_=len(starts) - 1
+        ).label('ring')
+    else:
+        ring = literal(0).label('ring')
+    
+    keys = [ApiMetrics.endpoint_name]
+    if group_by == 'status_class':
+        keys.append(cast(cast(ApiMetrics.status_code, Integer) / 100, Integer).label('status_class'))
+    keys.append(ring)
+    
+    query = db.session.query(
+        *keys,
+        func.count(ApiMetrics.id),
+        func.sum(ApiMetrics.is_success.cast(Integer)),
+        func.sum(ApiMetrics.response_time),
+        func.min(ApiMetrics.response_time),
+        func.max(ApiMetrics.response_time),
+        func.max(ApiMetrics.timestamp)
+    ).filter(
+        ApiMetrics.timestamp >= starts[-1]
+    )
+    if endpoint_names is not None:
+        query = query.filter(ApiMetrics.endpoint_name.in_(endpoint_names))
+    rows = query.group_by(*keys).all()
+    
+    endpoints = {}
+    for row in rows:
+        if group_by:
+            name, status_class, ring_index, total, successes, total_time, low, high, last_check = row
+        else:
+            name, ring_index, total, successes, total_time, low, high, last_check = row
+        entry = endpoints.get(name)
+        if entry is None:
+            entry = endpoints[name] = {
+                'last_check': None,
+                'windows': [[0, 0, 0.0, None, None, {}] for _ in windows]
+            }
+        if last_check and (entry['last_check'] is None or last_check > entry['last_check']):
+            entry['last_check'] = last_check
+        
+        # A ring counts towards its own window and every wider one
+        for acc in entry['windows'][ring_index:]:
+            acc[0] += total
+            acc[1] += successes or 0
+            acc[2] += total_time or 0.0
+            acc[3] = low if acc[3] is None else min(acc[3], low)
+            acc[4] = high if acc[4] is None else max(acc[4], high)
+            if group_by:
+                label = _status_class(status_class)
+                acc[5][label] = acc[5].get(label, 0) + total
+    
+    result = []
+    for name in sorted(endpoints):
+        entry = endpoints[name]
+        summary = {
+            'endpoint_name': name,
+            'last_check': entry['last_check'].isoformat() if entry['last_check'] else None,
+            'windows': {}
+        }
+        for hours, (total, successes, total_time, low, high, classes) in zip(windows, entry['windows']):
+            window = {
+                'total_checks': total,
+                'successful_checks': successes,
+                'failed_checks': total - successes,
+                'success_rate': round(successes / total * 100, 2) if total else 0,
+                'avg_response_time': round(total_time / total, 3) if total else 0,
+                'min_response_time': round(low, 3) if low else 0,
+                'max_response_time': round(high, 3) if high else 0
+            }
+            if group_by:
+                window['status_classes'] = classes
+            summary['windows'][str(hours)] = window
+        result.append(summary)
+    
+    return {'windows': windows, 'group_by': group_by, 'endpoints': result}
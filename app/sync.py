@@ -0,0 +1,88 @@
+from sqlalchemy import func
+from app import db
+from app.models import ApiMetrics, ApiEndpoints, ApiEndpointChange
+from app.cache import config_version
+from app.bulk import _chunks
+
+# Beyond this many changed endpoints a delta summary is computed unfiltered
+MAX_DELTA_NAMES = 500
+
+def parse_watermark(raw, parts=1):
+    """Parse a since watermark of one or more dash-separated non-negative integers.
+    
+    A bare 0 stands for an all-zero watermark, i.e. a request for a full snapshot.
+    """
+    try:
+        values = [int(value) for value in str(raw).split('-')]
+    except ValueError:
+        values = []
+    if values == [0]:
+        values = [0] * parts
+    if len(values) != parts or any(value < 0 for value in values):
+        raise ValueError("since must be a watermark returned by a previous response")
+    return values[0] if parts == 1 else values
+
+def metrics_watermark():
+    """Highest stored check id and endpoint-config version, the two parts of a summary watermark.
+    
+    Check ids are AUTOINCREMENT, so ids freed by deleting an endpoint's
+    checks are never handed out again and the watermark only moves forward.
+    """
+    metric_id = db.session.query(func.max(ApiMetrics.id)).scalar() or 0
+    version, _ = config_version()
+    return metric_id, version
+
+def endpoint_changes(since):
+    """Endpoints created or changed after config version since, plus deleted ids.
+    
+    A since of 0, or one newer than the current version (e.g. after the
+    database was reset), returns a full snapshot flagged with full=True.
+    """
+    version, _ = config_version()
+    if since <= 0 or since > version:
+        endpoints = ApiEndpoints.query.all()
+        return {'version': version, 'full': True, 'changed': [e.to_dict() for e in endpoints], 'deleted': []}
+    
+    ids = [
+        endpoint_id for endpoint_id, in db.session.query(ApiEndpointChange.endpoint_id).filter(
+            ApiEndpointChange.id > since,
+            ApiEndpointChange.id <= version
+        ).distinct()
+    ]
+    endpoints = []
+    for chunk in _chunks(ids):
+        endpoints.extend(ApiEndpoints.query.filter(ApiEndpoints.id.in_(chunk)).all())
+    
+    present = {endpoint.id for endpoint in endpoints}
+    return {
+        'version': version,
+        'full': False,
+        'changed': [endpoint.to_dict() for endpoint in sorted(endpoints, key=lambda e: e.id)],
+        'deleted': sorted(set(ids) - present)
+    }
+
+def changed_metric_names(since_metric, until_metric):
+    """Names of endpoints with checks stored in the id range (since_metric, until_metric]"""
+    return [
+        name for name, in db.session.query(ApiMetrics.endpoint_name).filter(
+            ApiMetrics.id > since_metric,
+            ApiMetrics.id <= until_metric
+        ).distinct()
+    ]
+
+def removed_metric_names(since_version, until_version, start_time):
+    """Names of endpoints deleted after since_version that no longer have checks since start_time"""
+    names = {
+        name for name, in db.session.query(ApiEndpointChange.endpoint_name).filter(
+            ApiEndpointChange.id > since_version,
+            ApiEndpointChange.id <= until_version,
+            ApiEndpointChange.is_deleted.is_(True)
+        ).distinct()
+    }
+    for chunk in _chunks(list(names)):
+        remaining = db.session.query(ApiMetrics.endpoint_name).filter(
+            ApiMetrics.endpoint_name.in_(chunk),
+            ApiMetrics.timestamp >= start_time
+        ).distinct()
+        names.difference_update(name for name, in remaining)
+    return sorted(names)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Drive ApiMonitor against a local stub farm and report probe throughput.
+
+Example:
+    python benchmarks/bench_monitor.py --endpoints 10000 --interval 10 --duration 60
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import common
+from common import ResourceTimer, emit
+from stub_farm import StubFarm
+
+from apscheduler.executors.pool import ThreadPoolExecutor
+from app import create_app
+from app.monitor import ApiMonitor
+from app.instrumentation import (
+    SCHEDULE_LAG, PROBE_DURATION, JOBS_MISSED, JOBS_DROPPED, WRITE_LATENCY
+)
+
+OUTCOMES = ('success', 'failure', 'timeout', 'connection_error', 'error')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark ApiMonitor probe throughput")
+    parser.add_argument('--endpoints', type=int, default=1000)
+    parser.add_argument('--interval', type=int, default=10, help="check interval per endpoint (s)")
+    parser.add_argument('--duration', type=float, default=30, help="measurement window (s)")
+    parser.add_argument('--workers', type=int, default=50, help="scheduler executor threads")
+    parser.add_argument('--servers', type=int, default=4, help="stub servers in the farm")
+    parser.add_argument('--timeout', type=int, default=5, help="probe timeout (s)")
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--jitter-ms', type=float, default=10)
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--size', type=int, default=256, help="response payload bytes")
+    parser.add_argument('--slow-rate', type=float, default=0.0)
+    parser.add_argument('--hang-rate', type=float, default=0.0)
+    parser.add_argument('--db', help="SQLite file to use (default: a temporary file)")
+    parser.add_argument('--log-checks', action='store_true', help="keep per-check INFO logging")
+    parser.add_argument('--json', help="also write results to this JSON file")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if not args.log_checks:
+        logging.getLogger('app.monitor').setLevel(logging.CRITICAL)
+        logging.getLogger('apscheduler').setLevel(logging.ERROR)
+    
+    workdir = tempfile.mkdtemp(prefix='api_monitor_bench_')
+    db_path = args.db or os.path.join(workdir, 'metrics.db')
+    app = create_app(config={'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'})
+    monitor = ApiMonitor(app)
+    monitor.scheduler.configure(executors={'default': ThreadPoolExecutor(args.workers)})
+    
+    with StubFarm(servers=args.servers) as farm:
+        definitions = [
+            {
+                'name': f'bench-{i}',
+                'url': farm.url(
+                    i,
+                    latency_ms=args.latency_ms,
+                    jitter_ms=args.jitter_ms,
+                    error_rate=args.error_rate,
+                    size=args.size,
+                    slow_rate=args.slow_rate,
+                    hang_rate=args.hang_rate,
+                    hang_s=args.timeout * 2
+                ),
+                'timeout': args.timeout,
+                'check_interval': args.interval
+            }
+            for i in range(args.endpoints)
+        ]
+        
+        with ResourceTimer() as load:
+            report = monitor.add_endpoints(definitions)
+        if report['errors']:
+            raise SystemExit(f"Import failed: {report['errors'][:5]}")
+        
+        with ResourceTimer() as start:
+            monitor.start_monitoring()
+        
+        with ResourceTimer() as run:
+            time.sleep(args.duration)
+        
+        monitor.scheduler.shutdown(wait=False)
+    
+    probes = {outcome: PROBE_DURATION.snapshot(outcome)[2] for outcome in OUTCOMES}
+    total = sum(probes.values())
+    expected = args.endpoints * args.duration / args.interval
+    
+    emit({
+        'config': vars(args),
+        'import': dict(load.as_dict(), endpoints=report['created']),
+        'startup': start.as_dict(),
+        'run': run.as_dict(),
+        'throughput': {
+            'checks': total,
+            'checks_per_s': round(total / run.wall, 1),
+            'target_checks_per_s': round(expected / run.wall, 1),
+            'by_outcome': probes
+        },
+        'schedule_lag_s': {
+            'p50': SCHEDULE_LAG.quantile(0.5),
+            'p99': SCHEDULE_LAG.quantile(0.99),
+            'max_bucket': SCHEDULE_LAG.quantile(1.0)
+        },
+        'scheduler': {
+            'missed': JOBS_MISSED.value(),
+            'dropped': JOBS_DROPPED.value()
+        },
+        'db_commit_s': {
+            'p50': WRITE_LATENCY.quantile(0.5),
+            'p99': WRITE_LATENCY.quantile(0.99)
+        }
+    }, args.json)
+
+if __name__ == "__main__":
+    main()
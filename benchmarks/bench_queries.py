@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark the /api/metrics* routes against a synthetic metrics.db.
+
+The database is generated once per row count and reused on later runs.
+
+Example:
+    python benchmarks/bench_queries.py --rows 1000000 --endpoints 200 --days 30
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import common
+from common import ResourceTimer, emit, percentile
+
+from app import create_app, db
+from app.histogram import backfill_histograms
+
+DEFAULT_ROUTES = [
+    '/api/metrics?limit=1000',
+    '/api/metrics?hours=1&limit=100000',
+    '/api/metrics?hours=1&limit=100000&format=columnar',
+    '/api/metrics/summary?hours=1',
+    '/api/metrics/summary?hours=24',
+    '/api/metrics/summary?hours=168',
+    '/api/metrics/grafana?hours=1',
+    '/api/metrics/grafana?hours=24&endpoint=endpoint-0',
+    '/api/metrics/grafana?hours=24&endpoint=endpoint-0&format=columnar',
+    '/api/metrics/heatmap?hours=24',
+    '/api/metrics/heatmap?hours=720&format=matrix',
+]
+
+BATCH_SIZE = 50000
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark metric query routes")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--endpoints', type=int, default=200)
+    parser.add_argument('--days', type=float, default=30, help="history span of the synthetic data")
+    parser.add_argument('--db', help="SQLite file (default: benchmarks/data/metrics_<rows>.db)")
+    parser.add_argument('--repeat', type=int, default=5, help="timed requests per route")
+    parser.add_argument('--route', action='append', help="route to benchmark (repeatable)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write results to this JSON file")
+    return parser.parse_args()
+
+def _rows(count, endpoints, days, seed):
+    """Yield synthetic ApiMetrics rows, newest last, evenly spread over the span"""
+    rng = random.Random(seed)
+    end = datetime.utcnow()
+    start = end - timedelta(days=days)
+    step = (end - start).total_seconds() / max(count, 1)
+    for i in range(count):
+        endpoint = rng.randrange(endpoints)
+        timestamp = start + timedelta(seconds=i * step)
+        failed = rng.random() < 0.02
+        response_time = rng.lognormvariate(-2.5, 0.6)
+        yield (
+            f'endpoint-{endpoint}',
+            f'http://stub.local/ep/{endpoint}',
+            response_time,
+            500 if failed else 200,
+            0 if failed else 1,
+            timestamp.isoformat(' ', 'microseconds'),
+            'Internal Server Error' if failed else None
+        )
+
+def _remove_database(path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def generate(db_path, rows, endpoints, days, seed):
+    """Build the database in a temporary file and move it to db_path only once complete.
+    
+    The schema is created through the app, rows are bulk-loaded with raw
+    sqlite3 and histograms are built afterwards. An interrupted run never
+    leaves a partial database behind to be reused as a cached one.
+    """
+    partial_path = db_path + '.partial'
+    _remove_database(partial_path)
+    try:
+        _load(partial_path, rows, endpoints, days, seed)
+        os.replace(partial_path, db_path)
+    finally:
+        _remove_database(partial_path)
+
+def _load(db_path, rows, endpoints, days, seed):
+    app = create_app(config={'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'})
+    # Close the app's pooled connections so the raw load is the only writer.
+    # The database is in WAL mode, which cannot be switched off while it is shared
+    with app.app_context():
+        db.engine.dispose()
+    
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA synchronous=OFF')
+    insert = (
+        'INSERT INTO api_metrics (endpoint_name, endpoint_url, response_time, status_code, '
+        'is_success, timestamp, error_message) VALUES (?, ?, ?, ?, ?, ?, ?)'
+    )
+    batch = []
+    for row in _rows(rows, endpoints, days, seed):
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            conn.executemany(insert, batch)
+            batch.clear()
+    if batch:
+        conn.executemany(insert, batch)
+    conn.commit()
+    conn.close()
+    
+    # The raw load bypasses ingest-time histogram counting; rebuild it like the schema migration does
+    with app.app_context():
+        with db.engine.begin() as connection:
+            backfill_histograms(connection)
+        # Fold the WAL into the main file, which is the only one that gets moved
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+        db.engine.dispose()
+
+def main():
+    args = parse_args()
+    data_dir = os.path.join(common.ROOT, 'benchmarks', 'data')
+    db_path = args.db or os.path.join(data_dir, f'metrics_{args.rows}.db')
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    
+    results = {'config': vars(args)}
+    if not os.path.exists(db_path):
+        with ResourceTimer() as gen:
+            generate(db_path, args.rows, args.endpoints, args.days, args.seed)
+        results['generate'] = dict(gen.as_dict(), rows_per_s=round(args.rows / gen.wall))
+    
+    # Disable the response cache so every request does the full work
+    app = create_app(config={
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'RESPONSE_CACHE_SIZE': 0
+    })
+    client = app.test_client()
+    
+    for route in args.route or DEFAULT_ROUTES:
+        client.get(route)  # Warm up the page cache
+        latencies = []
+        size = 0
+        with ResourceTimer() as timer:
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                response = client.get(route)
+                latencies.append(time.perf_counter() - start)
+                size = len(response.data)
+        results[route] = {
+            'status': response.status_code,
+            'bytes': size,
+            'min_ms': round(min(latencies) * 1000, 2),
+            'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'cpu_s_per_request': round(timer.cpu / args.repeat, 4),
+            'rss_end_mb': timer.as_dict()['rss_end_mb']
+        }
+    
+    emit(results, args.json)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+
+import json
+import os
+import sys
+import time
+
+# Make the app package importable when run as a script from the repo root
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))
+    return ordered[index]
+
+def rss_mb():
+    """Current resident set size in MB (falls back to peak RSS; None on Windows)"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        try:
+            import resource
+        except ImportError:
+            # Windows has neither /proc nor resource
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and KB elsewhere
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+class ResourceTimer:
+    """Measure wall time, CPU time and RSS over a block"""
+    
+    def __enter__(self):
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.rss_start = rss_mb()
+        return self
+    
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.wall_start
+        self.cpu = time.process_time() - self.cpu_start
+        self.rss_end = rss_mb()
+        return False
+    
+    def as_dict(self):
+        return {
+            'wall_s': round(self.wall, 3),
+            'cpu_s': round(self.cpu, 3),
+            'cpu_util': round(self.cpu / self.wall, 3) if self.wall else None,
+            'rss_start_mb': round(self.rss_start, 1) if self.rss_start is not None else None,
+            'rss_end_mb': round(self.rss_end, 1) if self.rss_end is not None else None
+        }
+
+def emit(results, json_path=None):
+    """Print results as aligned key/value lines and optionally write them as JSON"""
+    for section, values in results.items():
+        print(f"\n[{section}]")
+        if isinstance(values, dict):
+            width = max((len(str(key)) for key in values), default=0)
+            for key, value in values.items():
+                print(f"  {str(key).ljust(width)}  {value}")
+        else:
+            print(f"  {values}")
+    
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {json_path}")
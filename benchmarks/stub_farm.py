@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Local stub HTTP target farm for offline, repeatable monitor benchmarks.
+
+Each stub server answers any path; behaviour is controlled per URL through
+query parameters so every endpoint in a benchmark can get its own profile:
+
+    latency_ms   base response latency (default 0)
+    jitter_ms    uniform extra latency in [0, jitter_ms] (default 0)
+    error_rate   fraction of requests answered with HTTP 500 (default 0)
+    size         response payload size in bytes (default 64)
+    slow_rate    fraction of responses whose body trickles over slow_s seconds
+    hang_rate    fraction of requests that hang for hang_s seconds before closing
+"""
+
+import argparse
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode, urlparse, parse_qs
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def _param(self, params, name, default, cast=float):
+        values = params.get(name)
+        return cast(values[0]) if values else default
+    
+    def _handle(self):
+        params = parse_qs(urlparse(self.path).query)
+        latency_ms = self._param(params, 'latency_ms', 0.0)
+        jitter_ms = self._param(params, 'jitter_ms', 0.0)
+        error_rate = self._param(params, 'error_rate', 0.0)
+        size = self._param(params, 'size', 64, int)
+        slow_rate = self._param(params, 'slow_rate', 0.0)
+        slow_s = self._param(params, 'slow_s', 5.0)
+        hang_rate = self._param(params, 'hang_rate', 0.0)
+        hang_s = self._param(params, 'hang_s', 60.0)
+        
+        # Drain any request body so keep-alive connections stay usable
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        
+        rng = self.server.rng
+        if hang_rate and rng.random() < hang_rate:
+            time.sleep(hang_s)
+            self.close_connection = True
+            return
+        
+        delay = latency_ms + (rng.random() * jitter_ms if jitter_ms else 0.0)
+        if delay:
+            time.sleep(delay / 1000)
+        
+        status = 500 if error_rate and rng.random() < error_rate else 200
+        body = b'x' * size
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        
+        if slow_rate and rng.random() < slow_rate and body:
+            chunks = max(1, min(len(body), 10))
+            step = len(body) // chunks or 1
+            for i in range(0, len(body), step):
+                self.wfile.write(body[i:i + step])
+                self.wfile.flush()
+                time.sleep(slow_s / chunks)
+        else:
+            self.wfile.write(body)
+    
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+    
+    def log_message(self, format, *args):
+        pass
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+    
+    def __init__(self, address, seed):
+        super().__init__(address, StubHandler)
+        self.rng = random.Random(seed)
+
+class StubFarm:
+    """A set of local stub servers; endpoints are spread across them round-robin"""
+    
+    def __init__(self, servers=4, host='127.0.0.1', base_port=0, seed=0):
+        self.host = host
+        self.servers = []
+        self.threads = []
+        for i in range(servers):
+            port = base_port + i if base_port else 0
+            self.servers.append(_StubServer((host, port), seed + i))
+    
+    @property
+    def ports(self):
+        return [server.server_address[1] for server in self.servers]
+    
+    def start(self):
+        for server in self.servers:
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+    
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+    
+    def url(self, index, **behaviour):
+        """URL for stub endpoint number index with the given behaviour parameters"""
+        port = self.ports[index % len(self.servers)]
+        query = urlencode({key: value for key, value in behaviour.items() if value})
+        return f"http://{self.host}:{port}/ep/{index}" + (f"?{query}" if query else "")
+    
+    def wait_ready(self, timeout=5.0):
+        deadline = time.time() + timeout
+        for port in self.ports:
+            while True:
+                try:
+                    socket.create_connection((self.host, port), timeout=0.5).close()
+                    break
+                except OSError:
+                    if time.time() > deadline:
+                        raise
+                    time.sleep(0.05)
+    
+    def __enter__(self):
+        self.start()
+        self.wait_ready()
+        return self
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stub HTTP target farm")
+    parser.add_argument('--servers', type=int, default=4)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8100, help="port of the first server")
+    args = parser.parse_args()
+    
+    with StubFarm(servers=args.servers, host=args.host, base_port=args.port) as farm:
+        print(f"Stub farm listening on {args.host} ports {', '.join(map(str, farm.ports))}")
+        print(f"Example: {farm.url(0, latency_ms=50, error_rate=0.1, size=1024)}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("\nShutting down...")
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,120 @@ import threading
 import time
 from datetime import datetime, timedelta
 
+class PagedCardList:
+    """Keyed, paged list of cards that only rebuilds what changed.
+    
+    Cards are kept in a map keyed by item id. On refresh, cards whose data
+    is unchanged are left alone, changed cards are patched in place and only
+    the current page is mounted in a virtualized ListView, so the cost of a
+    refresh follows the number of changes rather than the catalog size.
+    """
+    
+    def __init__(self, key, build_card, patch_card, matches, page_size=50):
+        self.key = key
+        self.build_card = build_card
+        self.patch_card = patch_card
+        self.matches = matches
+        self.page_size = page_size
+        
+        self.items = {}   # key -> latest item data
+        self.cards = {}   # key -> (card, refs)
+        self.order = []   # keys in server order
+        self.query = ""
+        self.filter_value = "All"
+        self.page_index = 0
+        
+        self.view = ft.ListView(spacing=5, height=400, expand=True)
+        self.page_label = ft.Text("", size=12)
+        self.prev_btn = ft.IconButton(icon=ft.icons.CHEVRON_LEFT, on_click=self.prev_page)
+        self.next_btn = ft.IconButton(icon=ft.icons.CHEVRON_RIGHT, on_click=self.next_page)
+        self.pager = ft.Row([self.prev_btn, self.page_label, self.next_btn])
+    
+    def sync(self, items):
+        """Merge a full list of items, patching only cards whose data changed"""
+        seen = set()
+        order = []
+        for item in items:
+            key = self.key(item)
+            seen.add(key)
+            order.append(key)
+            if self.items.get(key) != item:
+                self.upsert(item)
+        
+        for key in list(self.items):
+            if key not in seen:
+                self.remove(key)
+        
+        self.order = order
+        self.render()
+    
+    def upsert(self, item):
+        """Add a new card or patch an existing one in place"""
+        key = self.key(item)
+        self.items[key] = item
+        if key in self.cards:
+            card, refs = self.cards[key]
+            self.patch_card(refs, item)
+        else:
+            self.cards[key] = self.build_card(item)
+            self.order.append(key)
+    
+    def remove(self, key):
+        """Drop a card from the map"""
+        self.items.pop(key, None)
+        self.cards.pop(key, None)
+        if key in self.order:
+            self.order.remove(key)
+    
+    def visible_keys(self):
+        """Keys matching the current search and filter, in display order"""
+        return [
+            key for key in self.order
+            if self.matches(self.items[key], self.query, self.filter_value)
+        ]
+    
+    def render(self):
+        """Mount only the cards of the current page"""
+        keys = self.visible_keys()
+        pages = max(1, (len(keys) + self.page_size - 1) // self.page_size)
+        self.page_index = min(self.page_index, pages - 1)
+        
+        start = self.page_index * self.page_size
+        page_keys = keys[start:start + self.page_size]
+        self.view.controls = [self.cards[key][0] for key in page_keys]
+        
+        if keys:
+            self.page_label.value = f"{start + 1}-{start + len(page_keys)} of {len(keys)}"
+        else:
+            self.page_label.value = "No items"
+        self.prev_btn.disabled = self.page_index == 0
+        self.next_btn.disabled = self.page_index >= pages - 1
+    
+    def set_query(self, query):
+        self.query = (query or "").strip().lower()
+        self.page_index = 0
+        self.render()
+    
+    def set_filter(self, value):
+        self.filter_value = value or "All"
+        self.page_index = 0
+        self.render()
+    
+    def prev_page(self, e=None):
+        if self.page_index > 0:
+            self.page_index -= 1
+            self.render()
+            self.view.page.update()
+    
+    def next_page(self, e=None):
+        self.page_index += 1
+        self.render()
+        self.view.page.update()
+
 class ApiMonitorUI:
+    # Window summaries age even without new checks, so resync them fully now and then
+    METRICS_FULL_SYNC_SECONDS = 300
+    
     def __init__(self, page: ft.Page):
         self.page = page
         self.page.title = "API Monitor Control Panel"
@@ -13,12 +126,28 @@ class ApiMonitorUI:
         self.page.window_height = 700
         self.page.theme_mode = ft.ThemeMode.LIGHT
         
-        # API base URL
+        # API base URL and a pooled session reused by every call
         self.api_base = "http://localhost:5000/api"
+        self.session = requests.Session()
+        
+        # Watermarks of the last sync; deltas since them are merged locally
+        self.endpoints_version = 0
+        self.metrics_watermark = "0-0"
+        self.metrics_full_sync_at = 0
         
         # UI components
-        self.endpoints_list = ft.Column()
-        self.metrics_display = ft.Column()
+        self.endpoints_list = PagedCardList(
+            key=lambda endpoint: endpoint['id'],
+            build_card=self.build_endpoint_card,
+            patch_card=self.patch_endpoint_card,
+            matches=self.endpoint_matches
+        )
+        self.metrics_display = PagedCardList(
+            key=lambda summary: summary['endpoint_name'],
+            build_card=self.build_metrics_card,
+            patch_card=self.patch_metrics_card,
+            matches=self.metrics_matches
+        )
         self.status_text = ft.Text("Disconnected", color="red")
         
         # Setup UI
@@ -71,19 +200,34 @@ class ApiMonitorUI:
             on_click=self.refresh_endpoints
         )
         
+        search_field = ft.TextField(
+            label="Search",
+            prefix_icon=ft.icons.SEARCH,
+            width=300,
+            on_change=lambda e: self.apply_view(self.endpoints_list.set_query, e.control.value)
+        )
+        status_filter = ft.Dropdown(
+            label="Status",
+            width=150,
+            options=[
+                ft.dropdown.Option("All"),
+                ft.dropdown.Option("Active"),
+                ft.dropdown.Option("Inactive")
+            ],
+            value="All",
+            on_change=lambda e: self.apply_view(self.endpoints_list.set_filter, e.control.value)
+        )
+        
         content = ft.Column([
             ft.Row([
                 ft.Text("Configured Endpoints", size=18, weight=ft.FontWeight.BOLD),
                 ft.Container(expand=True),
                 refresh_btn
             ]),
+            ft.Row([search_field, status_filter, ft.Container(expand=True), self.endpoints_list.pager]),
             ft.Divider(),
-            ft.Container(
-                content=ft.Column([self.endpoints_list]),
-                height=400,
-                expand=True
-            )
-        ], scroll=ft.ScrollMode.AUTO)
+            self.endpoints_list.view
+        ])
         
         return ft.Container(content=content, padding=20)
     
@@ -96,19 +240,35 @@ class ApiMonitorUI:
             on_click=self.refresh_metrics
         )
         
+        search_field = ft.TextField(
+            label="Search",
+            prefix_icon=ft.icons.SEARCH,
+            width=300,
+            on_change=lambda e: self.apply_view(self.metrics_display.set_query, e.control.value)
+        )
+        health_filter = ft.Dropdown(
+            label="Health",
+            width=150,
+            options=[
+                ft.dropdown.Option("All"),
+                ft.dropdown.Option("Healthy"),
+                ft.dropdown.Option("Degraded"),
+                ft.dropdown.Option("Failing")
+            ],
+            value="All",
+            on_change=lambda e: self.apply_view(self.metrics_display.set_filter, e.control.value)
+        )
+        
         content = ft.Column([
             ft.Row([
                 ft.Text("Metrics Summary", size=18, weight=ft.FontWeight.BOLD),
                 ft.Container(expand=True),
                 refresh_metrics_btn
             ]),
+            ft.Row([search_field, health_filter, ft.Container(expand=True), self.metrics_display.pager]),
             ft.Divider(),
-            ft.Container(
-                content=ft.Column([self.metrics_display]),
-                height=400,
-                expand=True
-            )
-        ], scroll=ft.ScrollMode.AUTO)
+            self.metrics_display.view
+        ])
         
         return ft.Container(content=content, padding=20)
     
@@ -170,7 +330,7 @@ class ApiMonitorUI:
         def check():
             while True:
                 try:
-                    response = requests.get(f"{self.api_base}/health", timeout=5)
+                    response = self.session.get(f"{self.api_base}/health", timeout=5)
                     if response.status_code == 200:
                         self.status_text.value = "Connected"
                         self.status_text.color = "green"
@@ -190,90 +350,173 @@ class ApiMonitorUI:
     def refresh_endpoints(self, e=None):
         """Refresh the endpoints list"""
         try:
-            response = requests.get(f"{self.api_base}/endpoints")
+            response = self.session.get(
+                f"{self.api_base}/endpoints",
+                params={"since": self.endpoints_version},
+                timeout=10
+            )
             if response.status_code == 200:
-                endpoints = response.json()
-                self.endpoints_list.controls.clear()
-                
-                for endpoint in endpoints:
-                    status_color = "green" if endpoint['is_active'] else "red"
-                    status_text = "Active" if endpoint['is_active'] else "Inactive"
-                    
-                    endpoint_card = ft.Card(
-                        content=ft.Container(
-                            content=ft.Column([
-                                ft.Row([
-                                    ft.Text(endpoint['name'], weight=ft.FontWeight.BOLD, size=16),
-                                    ft.Container(expand=True),
-                                    ft.Text(status_text, color=status_color, weight=ft.FontWeight.BOLD)
-                                ]),
-                                ft.Text(f"URL: {endpoint['url']}", size=12),
-                                ft.Text(f"Method: {endpoint['method']} | Interval: {endpoint['check_interval']}s", size=12),
-                                ft.Row([
-                                    ft.ElevatedButton(
-                                        "Toggle",
-                                        on_click=lambda e, ep_id=endpoint['id']: self.toggle_endpoint(ep_id),
-                                        bgcolor=ft.colors.ORANGE_100
-                                    ),
-                                    ft.ElevatedButton(
-                                        "Delete",
-                                        on_click=lambda e, ep_id=endpoint['id']: self.delete_endpoint(ep_id),
-                                        bgcolor=ft.colors.RED_100
-                                    )
-                                ])
-                            ]),
-                            padding=15
-                        )
-                    )
-                    self.endpoints_list.controls.append(endpoint_card)
-                
+                delta = response.json()
+                self.apply_delta(self.endpoints_list, delta)
+                self.endpoints_version = delta['version']
                 self.page.update()
             else:
                 self.show_error("Failed to fetch endpoints")
         except Exception as ex:
             self.show_error(f"Error: {str(ex)}")
     
+    def build_endpoint_card(self, endpoint):
+        """Build an endpoint card, returning it with the controls patched on change"""
+        refs = {
+            'name': ft.Text(weight=ft.FontWeight.BOLD, size=16),
+            'status': ft.Text(weight=ft.FontWeight.BOLD),
+            'url': ft.Text(size=12),
+            'details': ft.Text(size=12)
+        }
+        self.patch_endpoint_card(refs, endpoint)
+        
+        card = ft.Card(
+            content=ft.Container(
+                content=ft.Column([
+                    ft.Row([
+                        refs['name'],
+                        ft.Container(expand=True),
+                        refs['status']
+                    ]),
+                    refs['url'],
+                    refs['details'],
+                    ft.Row([
+                        ft.ElevatedButton(
+                            "Toggle",
+                            on_click=lambda e, ep_id=endpoint['id']: self.toggle_endpoint(ep_id),
+                            bgcolor=ft.colors.ORANGE_100
+                        ),
+                        ft.ElevatedButton(
+                            "Delete",
+                            on_click=lambda e, ep_id=endpoint['id']: self.delete_endpoint(ep_id),
+                            bgcolor=ft.colors.RED_100
+                        )
+                    ])
+                ]),
+                padding=15
+            )
+        )
+        return card, refs
+    
+    def patch_endpoint_card(self, refs, endpoint):
+        """Update an endpoint card's controls in place"""
+        refs['name'].value = endpoint['name']
+        refs['status'].value = "Active" if endpoint['is_active'] else "Inactive"
+        refs['status'].color = "green" if endpoint['is_active'] else "red"
+        refs['url'].value = f"URL: {endpoint['url']}"
+        refs['details'].value = f"Method: {endpoint['method']} | Interval: {endpoint['check_interval']}s"
+    
+    def endpoint_matches(self, endpoint, query, filter_value):
+        """Search and status filter for the endpoints list"""
+        if filter_value == "Active" and not endpoint['is_active']:
+            return False
+        if filter_value == "Inactive" and endpoint['is_active']:
+            return False
+        return not query or query in endpoint['name'].lower() or query in endpoint['url'].lower()
+    
     def refresh_metrics(self, e=None):
         """Refresh the metrics display"""
         try:
-            response = requests.get(f"{self.api_base}/metrics/summary")
+            since = self.metrics_watermark
+            if time.time() - self.metrics_full_sync_at > self.METRICS_FULL_SYNC_SECONDS:
+                since = "0-0"
+            
+            response = self.session.get(
+                f"{self.api_base}/metrics/summary",
+                params={"since": since},
+                timeout=10
+            )
             if response.status_code == 200:
-                summaries = response.json()
-                self.metrics_display.controls.clear()
-                
-                for summary in summaries:
-                    success_color = "green" if summary['success_rate'] > 95 else "orange" if summary['success_rate'] > 80 else "red"
-                    
-                    metrics_card = ft.Card(
-                        content=ft.Container(
-                            content=ft.Column([
-                                ft.Text(summary['endpoint_name'], weight=ft.FontWeight.BOLD, size=16),
-                                ft.Row([
-                                    ft.Column([
-                                        ft.Text(f"Success Rate: {summary['success_rate']}%", color=success_color, weight=ft.FontWeight.BOLD),
-                                        ft.Text(f"Total Checks: {summary['total_checks']}"),
-                                        ft.Text(f"Failed: {summary['failed_checks']}")
-                                    ], tight=True),
-                                    ft.Container(width=50),
-                                    ft.Column([
-                                        ft.Text(f"Avg Response: {summary['avg_response_time']}s"),
-                                        ft.Text(f"Min: {summary['min_response_time']}s"),
-                                        ft.Text(f"Max: {summary['max_response_time']}s")
-                                    ], tight=True)
-                                ]),
-                                ft.Text(f"Last Check: {summary['last_check'][:19] if summary['last_check'] else 'Never'}", size=10)
-                            ]),
-                            padding=15
-                        )
-                    )
-                    self.metrics_display.controls.append(metrics_card)
-                
+                delta = response.json()
+                self.apply_delta(self.metrics_display, delta)
+                self.metrics_watermark = delta['watermark']
+                if delta['full']:
+                    self.metrics_full_sync_at = time.time()
                 self.page.update()
             else:
                 self.show_error("Failed to fetch metrics")
         except Exception as ex:
             self.show_error(f"Error: {str(ex)}")
     
+    def build_metrics_card(self, summary):
+        """Build a metrics card, returning it with the controls patched on change"""
+        refs = {
+            'name': ft.Text(weight=ft.FontWeight.BOLD, size=16),
+            'success_rate': ft.Text(weight=ft.FontWeight.BOLD),
+            'total': ft.Text(),
+            'failed': ft.Text(),
+            'avg': ft.Text(),
+            'min': ft.Text(),
+            'max': ft.Text(),
+            'last_check': ft.Text(size=10)
+        }
+        self.patch_metrics_card(refs, summary)
+        
+        card = ft.Card(
+            content=ft.Container(
+                content=ft.Column([
+                    refs['name'],
+                    ft.Row([
+                        ft.Column([refs['success_rate'], refs['total'], refs['failed']], tight=True),
+                        ft.Container(width=50),
+                        ft.Column([refs['avg'], refs['min'], refs['max']], tight=True)
+                    ]),
+                    refs['last_check']
+                ]),
+                padding=15
+            )
+        )
+        return card, refs
+    
+    def patch_metrics_card(self, refs, summary):
+        """Update a metrics card's controls in place"""
+        refs['name'].value = summary['endpoint_name']
+        refs['success_rate'].value = f"Success Rate: {summary['success_rate']}%"
+        refs['success_rate'].color = self.success_color(summary['success_rate'])
+        refs['total'].value = f"Total Checks: {summary['total_checks']}"
+        refs['failed'].value = f"Failed: {summary['failed_checks']}"
+        refs['avg'].value = f"Avg Response: {summary['avg_response_time']}s"
+        refs['min'].value = f"Min: {summary['min_response_time']}s"
+        refs['max'].value = f"Max: {summary['max_response_time']}s"
+        refs['last_check'].value = f"Last Check: {summary['last_check'][:19] if summary['last_check'] else 'Never'}"
+    
+    def metrics_matches(self, summary, query, filter_value):
+        """Search and health filter for the metrics list"""
+        color = self.success_color(summary['success_rate'])
+        if filter_value == "Healthy" and color != "green":
+            return False
+        if filter_value == "Degraded" and color != "orange":
+            return False
+        if filter_value == "Failing" and color != "red":
+            return False
+        return not query or query in summary['endpoint_name'].lower()
+    
+    def success_color(self, success_rate):
+        return "green" if success_rate > 95 else "orange" if success_rate > 80 else "red"
+    
+    def apply_delta(self, cards, delta):
+        """Merge a since-watermark response into a card list"""
+        if delta['full']:
+            cards.sync(delta['changed'])
+            return
+        
+        for item in delta['changed']:
+            if cards.items.get(cards.key(item)) != item:
+                cards.upsert(item)
+        for key in delta['deleted']:
+            cards.remove(key)
+        cards.render()
+    
+    def apply_view(self, setter, value):
+        """Apply a search or filter change and redraw the current page"""
+        setter(value)
+        self.page.update()
+    
     def add_endpoint(self, e):
         """Add a new endpoint"""
         try:
@@ -309,7 +552,7 @@ class ApiMonitorUI:
                     return
             
             # Send request
-            response = requests.post(f"{self.api_base}/endpoints", json=data)
+            response = self.session.post(f"{self.api_base}/endpoints", json=data)
             
             if response.status_code == 201:
                 self.show_success("Endpoint added successfully!")
@@ -336,7 +579,7 @@ class ApiMonitorUI:
     def toggle_endpoint(self, endpoint_id):
         """Toggle endpoint active status"""
         try:
-            response = requests.post(f"{self.api_base}/endpoints/{endpoint_id}/toggle")
+            response = self.session.post(f"{self.api_base}/endpoints/{endpoint_id}/toggle")
             if response.status_code == 200:
                 self.refresh_endpoints()
             else:
@@ -348,7 +591,7 @@ class ApiMonitorUI:
         """Delete an endpoint"""
         def confirm_delete(e):
             try:
-                response = requests.delete(f"{self.api_base}/endpoints/{endpoint_id}")
+                response = self.session.delete(f"{self.api_base}/endpoints/{endpoint_id}")
                 if response.status_code == 200:
                     self.show_success("Endpoint deleted successfully!")
                     self.refresh_endpoints()
@@ -3,7 +3,9 @@
 Main script to run the API Monitor system
 """
 
+import argparse
 import os
+import socket
 import sys
 import threading
 import time
@@ -43,13 +45,12 @@ def run_flask_app():
                 }
             ]
             
-            for endpoint_data in sample_endpoints:
-                monitor.add_endpoint(**endpoint_data)
+            monitor.add_endpoints(sample_endpoints)
             
             print("Added sample endpoints for testing")
     
-    # Start monitoring
-    monitor.start_monitoring()
+    # Start monitoring in the background so the API serves while jobs load
+    threading.Thread(target=monitor.start_monitoring, daemon=True).start()
     
     print("Starting Flask server...")
     print("API endpoints available at: http://localhost:5000/api/")
@@ -60,15 +61,60 @@ def run_flask_app():
     # Run Flask app
     app.run(debug=False, host='0.0.0.0', port=5000, use_reloader=False)
 
+def run_headless(host, port, workers):
+    """Serve the API without the UI under a production WSGI server.
+    
+    Uses gunicorn with several worker processes where available, otherwise
+    waitress. Each worker loads wsgi.py, which elects one scheduler leader.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        BaseApplication = None
+    
+    if BaseApplication is not None:
+        class HeadlessApplication(BaseApplication):
+            def load_config(self):
+                self.cfg.set('bind', f"{host}:{port}")
+                self.cfg.set('workers', workers)
+            
+            def load(self):
+                from wsgi import app
+                return app
+        
+        print(f"Serving API on http://{host}:{port}/api/ with {workers} gunicorn workers")
+        HeadlessApplication().run()
+        return
+    
+    try:
+        from waitress import serve
+    except ImportError:
+        print("No production server installed. Run: pip install gunicorn (or waitress on Windows)")
+        sys.exit(1)
+    
+    from wsgi import app
+    print(f"Serving API on http://{host}:{port}/api/ with waitress ({workers * 4} threads)")
+    serve(app, host=host, port=port, threads=workers * 4)
+
+def wait_for_api(port=5000, timeout=10.0):
+    """Wait until the Flask server accepts connections"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
 def run_flet_ui():
     """Run the Flet desktop UI"""
-    # Wait a moment for Flask to start
-    time.sleep(3)
-    
     print("Starting Flet UI...")
     try:
+        # Import Flet while Flask starts, then open the UI as soon as the API is up
         import flet as ft
         from flet_ui.main import main
+        wait_for_api()
         ft.app(target=main, view=ft.AppView.FLET_APP)
     except ImportError:
         print("Flet not installed. Run: pip install -r requirements.txt")
@@ -76,6 +122,13 @@ def run_flet_ui():
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="Run the API Monitor system")
+    parser.add_argument('--headless', action='store_true', help="serve the API only, under a production WSGI server")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="worker processes in headless mode")
+    args = parser.parse_args()
+    
     print("=" * 50)
     print("API Monitor System")
     print("=" * 50)
@@ -83,6 +136,10 @@ def main():
     # Ensure instance directory exists
     os.makedirs('instance', exist_ok=True)
     
+    if args.headless:
+        run_headless(args.host, args.port, args.workers)
+        return
+    
     # Start Flask in a separate thread
     flask_thread = threading.Thread(target=run_flask_app, daemon=True)
     flask_thread.start()
@@ -0,0 +1,23 @@
+"""
+WSGI entry point for serving the API headless under a production server:
+
+    gunicorn -w 4 -b 0.0.0.0:5000 wsgi:app
+    waitress-serve --listen=0.0.0.0:5000 wsgi:app
+
+Every worker serves the API; the one holding the leader lock also runs the
+scheduled checks, and a standby worker takes over if it exits.
+"""
+
+from app import create_app
+from app.leader import LeaderElection
+from app.monitor import monitor
+
+app = create_app()
+monitor.init_app(app)
+
+leader = LeaderElection(
+    app.config['LEADER_LOCK_FILE'],
+    on_elected=monitor.start_monitoring,
+    retry_interval=app.config['LEADER_RETRY_INTERVAL']
+)
+leader.start()